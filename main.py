@@ -7,7 +7,6 @@ from utils.logging_setup import setup_logging
 from utils.validation import mask_api_key, load_schema, validate_record
 from utils.retry_handler import retry
 from tasks.preprocessing import Preprocessor
-from tasks.postprocessing import PostProcessor
 from utils.input_processor import InputProcessor
 from utils.file_handler import output_2_jsonl
 def main():
@@ -1,31 +1,44 @@
 # providers/__init__.py
 
-from providers.openai_provider import OpenAIProvider
-from providers.groq_provider import GroqProvider
-from providers.gemini_provider import GeminiProvider
-from providers.ollama_provider import OllamaProvider
+import importlib
 from typing import List, Dict, Any, Optional
+from providers.response_cache import get_cache
+
+# Provider name -> "module:class". Modules are imported on first use so that
+# unused provider SDKs are never loaded.
+_PROVIDERS = {
+    'groq': 'providers.groq_provider:GroqProvider',
+    'openai': 'providers.openai_provider:OpenAIProvider',
+    'google_gemini': 'providers.gemini_provider:GeminiProvider',
+    'gemini': 'providers.gemini_provider:GeminiProvider',
+    'ollama': 'providers.ollama_provider:OllamaProvider'
+}
+
+# Provider classes that have already been imported
+_PROVIDER_CLASSES: Dict[str, type] = {}
 
 class ProviderFactory:
     @staticmethod
     def get_provider(name: str, config: Dict[str, Any], requirements: str):
         """
         Factory method to initialize the appropriate provider based on the name.
-        
+
         :param name: Name of the provider.
         :param config: Configuration dictionary for the provider.
         :param requirements: Processing requirements.
         :return: Instance of the provider.
         """
-        providers = {
-            'groq': GroqProvider,
-            'openai': OpenAIProvider,
-            'google_gemini': GeminiProvider,
-            'ollama': OllamaProvider
-        }
-        
-        provider_class = providers.get(name.lower())
-        if not provider_class:
-            raise ValueError(f"Provider '{name}' is not supported.")
-        
-        return provider_class(config, requirements)
\ No newline at end of file
+        provider_name = name.lower()
+        provider_class = _PROVIDER_CLASSES.get(provider_name)
+        if provider_class is None:
+            try:
+                module_name, class_name = _PROVIDERS[provider_name].split(':')
+            except KeyError:
+                raise ValueError(f"Provider '{name}' is not supported.")
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            _PROVIDER_CLASSES[provider_name] = provider_class
+
+        provider = provider_class(config, requirements)
+        # Providers configured with the same cache settings share one backend
+        provider.cache = get_cache(config.get('cache'))
+        return provider
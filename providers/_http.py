@@ -0,0 +1,60 @@
+# providers/_http.py
+
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+# HTTP/2 multiplexes concurrent requests over one connection, but needs the h2 package
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+_CLIENT: Optional[httpx.Client] = None
+_CLIENT_LOCK = threading.Lock()
+
+# An AsyncClient's connections belong to the event loop that opened them,
+# so keep one client per running loop
+_ASYNC_CLIENTS: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.Client:
+    """
+    Return the process-wide pooled HTTP client shared by all providers.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(http2=_HTTP2, limits=_LIMITS, timeout=_TIMEOUT)
+            atexit.register(_CLIENT.close)
+        return _CLIENT
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the pooled async HTTP client shared by all providers on the running event loop.
+    Must be called from inside a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=_HTTP2, limits=_LIMITS, timeout=_TIMEOUT)
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """
+    Close the shared async client of the running event loop, e.g. before asyncio.run returns.
+    """
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
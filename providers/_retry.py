@@ -0,0 +1,14 @@
+# providers/_retry.py
+
+from utils.retry_handler import retry
+
+
+def transient_retry(exceptions):
+    """
+    Retry policy for provider API calls: up to 6 attempts with jittered exponential
+    backoff (1s, 2s, 4s, ... capped at 30s). Only the given transient errors
+    (rate limits, timeouts, dropped connections) are retried.
+
+    :param exceptions: Tuple of exception types that should be retried.
+    """
+    return retry(max_attempts=6, delay=1, backoff=2, max_delay=30, jitter=True, exceptions=exceptions)
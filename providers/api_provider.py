@@ -1,7 +1,13 @@
 # providers/api_provider.py
 
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+from providers.response_cache import CacheBackend, cache_key
+from utils.rate_limiter import TokenBucket, get_shared_bucket
+
+logger = logging.getLogger(__name__)
 
 class APIProvider(ABC):
     """
@@ -17,15 +23,121 @@ class APIProvider(ABC):
         """
         self.config = config
         self.requirements = requirements
+        # Shared response cache, attached by ProviderFactory when configured
+        self.cache: Optional[CacheBackend] = None
+        self.cache_ttl = (config.get('cache') or {}).get('ttl')
+        # Requests-per-minute budget shared by every provider using the same API key.
+        # send_message does not draw from it; callers (InputProcessor, batches) acquire it.
+        rpm = config.get('rpm')
+        self.rate_limiter: Optional[TokenBucket] = (
+            get_shared_bucket(config.get('api_key') or type(self).__name__, rpm) if rpm else None
+        )
+
+    def _cache_key(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
+        """
+        Build the response cache key for a request, or None when caching does not apply.
+
+        :param prompt: The prompt to send to the LLM.
+        :param stop_sequence: Optional list of stop sequences.
+        :param json_mode: Whether JSON output was requested.
+        :return: The cache key or None.
+        """
+        if self.cache is None:
+            return None
+        return cache_key(
+            model=getattr(self, 'model_name', self.config.get('model_name')),
+            prompt=prompt,
+            temperature=getattr(self, 'temperature', self.config.get('temperature', 0.0)),
+            stop=stop_sequence,
+            max_output_tokens=self.config.get('max_output_tokens'),
+            top_p=self.config.get('top_p'),
+            top_k=self.config.get('top_k'),
+            json_mode=json_mode
+        )
+
+    def _cache_lookup(self, key: Optional[str]) -> Optional[str]:
+        """
+        Return the cached response for a key, if any.
+
+        :param key: Cache key from _cache_key.
+        :return: The cached response or None on a miss.
+        """
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug("Returning cached LLM response.")
+        return cached
+
+    def _cache_store(self, key: Optional[str], content: Optional[str]) -> Optional[str]:
+        """
+        Store a successful response in the cache and pass it through.
+
+        :param key: Cache key from _cache_key.
+        :param content: The response content (None responses are not cached).
+        :return: The content unchanged.
+        """
+        if key is not None and content:
+            self.cache.set(key, content, self.cache_ttl)
+        return content
 
     @abstractmethod
-    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Optional[str]:
+    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
         """
         Send a message to the LLM API and retrieve the response.
         Must be implemented by subclasses.
         
         :param prompt: The prompt to send to the LLM.
         :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
         :return: The response content from the LLM or None if the call fails.
         """
         pass
+
+    async def asend_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
+        """
+        Asynchronously send a message to the LLM API and retrieve the response.
+        Providers with a native async client should override this; the default
+        runs send_message in a worker thread so it never blocks the event loop.
+
+        :param prompt: The prompt to send to the LLM.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
+        :return: The response content from the LLM or None if the call fails.
+        """
+        return await asyncio.to_thread(self.send_message, prompt, stop_sequence, json_mode)
+
+    def stream_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Send a message to the LLM API and yield the response text as it is generated.
+        Providers with a streaming API should override this; the default yields the
+        complete response in one piece.
+
+        :param prompt: The prompt to send to the LLM.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :return: Iterator over the generated text fragments.
+        """
+        content = self.send_message(prompt, stop_sequence)
+        if content:
+            yield content
+
+    async def process_batch(self, prompts: List[str], concurrency_limit: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Send many prompts concurrently, with at most concurrency_limit requests in flight
+        and, when 'rpm' is configured, no more than rpm requests started per minute.
+
+        :param prompts: The prompts to send.
+        :param concurrency_limit: Maximum number of concurrent requests; defaults to the
+                                  provider's 'concurrency_limit' setting, or 10.
+        :return: The response for each prompt, in order (None where the call failed).
+        """
+        limit = concurrency_limit or self.config.get('concurrency_limit', 10)
+        semaphore = asyncio.Semaphore(limit)
+
+        async def send(prompt: str) -> Optional[str]:
+            async with semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async()
+                return await self.asend_message(prompt)
+
+        return await asyncio.gather(*(send(prompt) for prompt in prompts))
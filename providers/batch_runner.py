@@ -0,0 +1,108 @@
+# providers/batch_runner.py
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional, Set
+
+import orjson
+
+from providers.api_provider import APIProvider
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _ends_without_newline(path: str) -> bool:
+    """
+    Check whether a non-empty file is missing its trailing newline, e.g. after a crash mid-write.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b'\n'
+
+
+def load_completed_ids(output_jsonl: str) -> Set[str]:
+    """
+    Read the custom_ids already recorded in a checkpoint file.
+    A truncated last line (from a crash mid-write) is ignored.
+
+    :param output_jsonl: Path to the append-only results file.
+    :return: Set of completed custom_ids.
+    """
+    done = set()
+    if not os.path.exists(output_jsonl):
+        return done
+    with open(output_jsonl, 'rb') as f:
+        for line in f:
+            try:
+                done.add(orjson.loads(line)["custom_id"])
+            except (orjson.JSONDecodeError, KeyError):
+                logger.warning(f"Skipping unreadable line in '{output_jsonl}'.")
+    return done
+
+
+async def process_batch(
+    provider: APIProvider,
+    records: Iterable[Dict[str, Any]],
+    output_jsonl: str,
+    concurrency: int = 20,
+    json_mode: bool = False
+) -> int:
+    """
+    Send each record's prompt to the provider and append every result to a JSONL
+    checkpoint as soon as it completes. On restart, records whose custom_id is already
+    in the checkpoint are skipped, so an interrupted run resumes where it stopped
+    instead of paying for completed requests again.
+
+    :param provider: The provider to send prompts to.
+    :param records: Dictionaries with a unique 'custom_id' and the 'prompt' to send.
+    :param output_jsonl: Path to the append-only results file.
+    :param concurrency: Maximum number of requests in flight.
+    :param json_mode: Ask the model to reply with a single JSON object.
+    :return: Number of records processed in this run.
+    """
+    done = load_completed_ids(output_jsonl)
+    # Skip completed records and repeated custom_ids, which would otherwise be sent twice
+    seen = set(done)
+    pending = []
+    for record in records:
+        if record["custom_id"] not in seen:
+            seen.add(record["custom_id"])
+            pending.append(record)
+    if done:
+        logger.info(f"Resuming batch: {len(done)} records already completed, {len(pending)} remaining.")
+
+    output_dir = os.path.dirname(output_jsonl)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    needs_newline = _ends_without_newline(output_jsonl)
+    with open(output_jsonl, 'ab') as f:
+        if needs_newline:
+            # Terminate a line truncated by a crash so the first new result starts on its own line
+            f.write(b'\n')
+
+        async def run(record: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                if provider.rate_limiter is not None:
+                    await provider.rate_limiter.acquire_async()
+                result = await provider.asend_message(record["prompt"], json_mode=json_mode)
+            if result is None:
+                # Leave failed records out of the checkpoint so the next run retries them
+                logger.warning(f"No response for record {record['custom_id']}.")
+                return None
+            # Writes happen on the event loop thread, so lines never interleave
+            f.write(orjson.dumps({"custom_id": record["custom_id"], "response": result}, option=orjson.OPT_APPEND_NEWLINE))
+            f.flush()
+            return result
+
+        results = await asyncio.gather(*(run(record) for record in pending))
+
+    completed = sum(1 for result in results if result is not None)
+    logger.info(f"Batch finished: {completed} of {len(pending)} records completed this run.")
+    return completed
@@ -0,0 +1,57 @@
+# providers/fanout.py
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from providers.api_provider import APIProvider
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def _send(provider: APIProvider, prompt: str, stop_sequence: Optional[List[str]], json_mode: bool) -> Optional[str]:
+    """
+    Send one prompt to one provider, drawing from its own rate limit when configured.
+    """
+    if provider.rate_limiter is not None:
+        await provider.rate_limiter.acquire_async()
+    return await provider.asend_message(prompt, stop_sequence, json_mode)
+
+
+async def first_response(
+    providers: List[APIProvider],
+    prompt: str,
+    stop_sequence: Optional[List[str]] = None,
+    json_mode: bool = False
+) -> Optional[str]:
+    """
+    Send the same prompt to several providers at once and return the first successful reply.
+    Latency is that of the fastest provider, and a failing provider falls back to the others
+    automatically. The slower requests are cancelled once one provider answers, but only
+    providers with a native async client (e.g. Groq, OpenAI, Ollama) actually abort the call.
+    Thread-backed providers such as GeminiProvider keep running in their worker thread until
+    the call completes, so those requests are still billed and their rate-limit token is spent.
+
+    :param providers: The providers to query.
+    :param prompt: The prompt to send.
+    :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+    :param json_mode: Ask the models to reply with a single JSON object.
+    :return: The first non-empty response, or None if every provider failed.
+    """
+    pending = {
+        asyncio.create_task(_send(provider, prompt, stop_sequence, json_mode))
+        for provider in providers
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result():
+                    return task.result()
+        logger.error("No provider returned a response.")
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
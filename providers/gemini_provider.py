@@ -2,14 +2,43 @@
 
 import logging
 import time
+from functools import lru_cache
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, DeadlineExceeded, InternalServerError
 
 from providers.api_provider import APIProvider
+from providers._retry import transient_retry
 from typing import Optional, List, Dict, Any
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: quota exhaustion, timeouts and temporary server failures
+_TRANSIENT_ERRORS = (ResourceExhausted, ServiceUnavailable, DeadlineExceeded, InternalServerError)
+
+
+# API key most recently passed to genai.configure()
+_CONFIGURED_KEY: Optional[str] = None
+
+
+@lru_cache(maxsize=16)
+def _get_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """
+    Return a shared GenerativeModel handle for the API key and model name.
+    Generation settings are passed per request, so handles can be reused across provider instances.
+
+    genai.configure() sets the key for the whole process, and every model (sync and async)
+    builds its client from it. Only one Gemini API key per process is supported: configuring
+    a second key switches all models created afterwards, and older ones that have not yet
+    sent a request, over to it.
+    """
+    global _CONFIGURED_KEY
+    if _CONFIGURED_KEY is not None and _CONFIGURED_KEY != api_key:
+        logger.warning("A second Google Gemini API key was configured; only one key per process is supported.")
+    genai.configure(api_key=api_key)
+    _CONFIGURED_KEY = api_key
+    return genai.GenerativeModel(model_name)
+
 
 class GeminiProvider(APIProvider):
     """
@@ -33,38 +62,56 @@ class GeminiProvider(APIProvider):
             self.api_key = api_key
             self.model_name = config.get("model_name", "gemini-1.5-flash")
 
-            self.generation_config = genai.configure(api_key=self.api_key)
-
             # Set up the generation configuration
-            self.generation_config = genai.GenerationConfig(
+            generation_settings = dict(
                 temperature=config.get("temperature", 0.0),
                 top_p=config.get("top_p", 0.8),
                 top_k=config.get("top_k", 32),
                 candidate_count=config.get("candidate_count", 1),
                 max_output_tokens=config.get("max_output_tokens", 2048),
             )
+            self.generation_config = genai.GenerationConfig(**generation_settings)
+            # Same settings, but constrained to a JSON reply
+            self.json_generation_config = genai.GenerationConfig(
+                **generation_settings,
+                response_mime_type="application/json",
+            )
+            # Shared across provider instances using the same API key and model
+            self.model = _get_model(self.api_key, self.model_name)
             
             logger.info("GoogleGeminiProvider initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize GoogleGeminiProvider: {e}")
             raise
 
-    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Optional[str]:
+    @transient_retry(_TRANSIENT_ERRORS)
+    def _generate_content(self, model, **kwargs):
+        """
+        Generate content, retrying transient Google Gemini API errors with backoff.
+        """
+        return model.generate_content(**kwargs)
+
+    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
         """
         Send a message to the Google Gemini API and retrieve the response.
 
         :param prompt: The prompt to send to Gemini.
         :param stop_sequence: Optional list of stop sequences to terminate the LLM response (not currently supported).
+        :param json_mode: Ask the model to reply with a single JSON object.
         :return: The response content from Gemini or None if the call fails.
         """
         try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
             logger.debug("Sending prompt to Google Gemini API.")
             user_input = prompt
-            model = genai.GenerativeModel(self.model_name)
 
-            response = model.generate_content(
+            response = self._generate_content(
+                self.model,
                 contents=user_input,
-                generation_config=self.generation_config,
+                generation_config=self.json_generation_config if json_mode else self.generation_config,
                 stream=False,  # Set streaming based on your needs
                 tools=[],
             )
@@ -80,7 +127,7 @@ class GeminiProvider(APIProvider):
                 return None
 
             logger.debug(f"Content received: {generated_text}")
-            return generated_text
+            return self._cache_store(cache_key, generated_text)
 
         except Exception as e:
             logger.error(f"Error during Google Gemini API call: {e}")
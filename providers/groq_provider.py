@@ -1,14 +1,20 @@
 # providers/groq_provider.py
 
 import logging
-from typing import Optional, List, Dict, Any
-from groq import Groq  # Ensure the Groq SDK is installed
+from typing import Optional, List, Dict, Any, Iterator
+from groq import Groq, AsyncGroq, NOT_GIVEN  # Ensure the Groq SDK is installed
+from groq import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from providers.api_provider import APIProvider
+from providers._retry import transient_retry
+from providers._http import get_client, get_async_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx responses
+_TRANSIENT_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
 class GroqProvider(APIProvider):
     """
     A modular provider for interacting with the Groq LLM API.
@@ -27,7 +33,13 @@ class GroqProvider(APIProvider):
             if not api_key:
                 logger.error("Groq API key is missing.")
                 raise ValueError("Groq API key is missing.")
-            self.client = Groq(api_key=api_key)
+            # Share the process-wide pooled keep-alive HTTP client across all providers;
+            # retries are handled by transient_retry rather than the SDK
+            self.client = Groq(api_key=api_key, http_client=get_client(), max_retries=0)
+            self.api_key = api_key
+            # Created on first async use and rebuilt if the event loop changes
+            self.async_client: Optional[AsyncGroq] = None
+            self._async_http_client = None
             self.model_name = config.get('model_name', "llama3-70b-8192")
             self.temperature = config.get('temperature', 0.7)
             self.max_output_tokens = config.get('max_output_tokens', 4096)
@@ -36,38 +48,123 @@ class GroqProvider(APIProvider):
             logger.error(f"Failed to initialize GroqProvider: {e}")
             raise
 
-    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Optional[str]:
+    def _extract_content(self, response) -> Optional[str]:
+        """
+        Extract the generated text from a chat completion response.
+
+        :param response: The chat completion returned by the Groq SDK.
+        :return: The response content or None if it is missing or empty.
+        """
+        if not response or not hasattr(response, 'choices') or not response.choices:
+            logger.error("Invalid or empty response structure from Groq API.")
+            return None
+
+        content = response.choices[0].message.content.strip()
+        if not content:
+            logger.error("Empty content received in the response from Groq API.")
+            return None
+        logger.debug(f"Content received {content}")
+
+        return content
+
+    @transient_retry(_TRANSIENT_ERRORS)
+    def _create_completion(self, **kwargs):
+        """
+        Create a chat completion, retrying transient Groq API errors with backoff.
+        """
+        return self.client.chat.completions.create(**kwargs)
+
+    @transient_retry(_TRANSIENT_ERRORS)
+    async def _acreate_completion(self, **kwargs):
+        """
+        Asynchronously create a chat completion, retrying transient Groq API errors with backoff.
+        """
+        return await self.async_client.chat.completions.create(**kwargs)
+
+    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
         """
         Send a message to the Groq API and retrieve the response.
 
         :param prompt: The prompt to send to Groq.
         :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
         :return: The response content from Groq or None if the call fails.
         """
         try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
             logger.debug("Sending prompt to Groq API.")
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_output_tokens,
-                stop=stop_sequence
+                stop=stop_sequence,
+                response_format={"type": "json_object"} if json_mode else NOT_GIVEN
             )
             logger.debug("Received response from Groq API.")
+            return self._cache_store(cache_key, self._extract_content(response))
 
-            if not response or not hasattr(response, 'choices') or not response.choices:
-                logger.error("Invalid or empty response structure from Groq API.")
-                return None
+        except Exception as e:
+            logger.error(f"Error during Groq API call: {e}")
+            return None
 
-            content = response.choices[0].message.content.strip()
-            if not content:
-                logger.error("Empty content received in the response from Groq API.")
-                return None
-            logger.debug(f"Content received {content}")
+    async def asend_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
+        """
+        Asynchronously send a message to the Groq API using the AsyncGroq client.
 
-            return content
-            
+        :param prompt: The prompt to send to Groq.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
+        :return: The response content from Groq or None if the call fails.
+        """
+        try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+            http_client = get_async_client()
+            if self.async_client is None or self._async_http_client is not http_client:
+                self.async_client = AsyncGroq(api_key=self.api_key, http_client=http_client, max_retries=0)
+                self._async_http_client = http_client
+            logger.debug("Sending prompt to Groq API (async).")
+            response = await self._acreate_completion(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=self.max_output_tokens,
+                stop=stop_sequence,
+                response_format={"type": "json_object"} if json_mode else NOT_GIVEN
+            )
+            logger.debug("Received response from Groq API.")
+            return self._cache_store(cache_key, self._extract_content(response))
 
         except Exception as e:
             logger.error(f"Error during Groq API call: {e}")
             return None
+
+    def stream_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Send a message to the Groq API and yield the response text as it is generated.
+
+        :param prompt: The prompt to send to Groq.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :return: Iterator over the generated text fragments.
+        """
+        try:
+            logger.debug("Streaming prompt to Groq API.")
+            stream = self._create_completion(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=self.max_output_tokens,
+                stop=stop_sequence,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Error during Groq API streaming call: {e}")
@@ -1,14 +1,23 @@
 # providers/ollama_provider.py
 
 import logging
+import httpx
+import orjson
 import requests  # Make sure the requests library is installed
+from requests.adapters import HTTPAdapter
 from providers.api_provider import APIProvider
-from typing import Optional, List, Dict, Any
+from providers._http import get_async_client
+from providers._retry import transient_retry
+from typing import Optional, List, Dict, Any, Iterator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: the local server is restarting or a request timed out
+_TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+_ASYNC_TRANSIENT_ERRORS = (httpx.TransportError,)
+
 class OllamaProvider(APIProvider):
     """
     A modular provider for interacting with the Ollama API.
@@ -25,51 +34,164 @@ class OllamaProvider(APIProvider):
         try:
             self.base_url = config.get("ollama_api_url", "http://localhost:11434")  # Default to local Ollama instance
             self.model_name = config.get('model_name', "llama3.1")
+            self.temperature = config.get('temperature', 0.7)
+            self.max_output_tokens = config.get('max_output_tokens', 4096)
+
+            # Reuse keep-alive connections across requests
+            pool_size = config.get('pool_size', 16)
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
             logger.info("OllamaProvider initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize OllamaProvider: {e}")
             raise
 
-    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Optional[str]:
+    def _build_payload(
+        self,
+        prompt: str,
+        stop_sequence: Optional[List[str]] = None,
+        json_mode: bool = False,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build the request body for the /api/generate endpoint.
+
+        :param prompt: The prompt to send to Ollama.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Constrain the reply to valid JSON.
+        :param stream: Whether Ollama should stream the reply as it is generated.
+        :return: The JSON payload.
+        """
+        options = {
+            "temperature": self.temperature,
+            "num_predict": self.max_output_tokens
+        }
+        if stop_sequence:
+            options["stop"] = stop_sequence
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "options": options,
+            "stream": stream
+        }
+        if json_mode:
+            payload["format"] = "json"
+        return payload
+
+    def _parse_response(self, result: Dict[str, Any]) -> Optional[str]:
+        """
+        Extract the generated text from a decoded Ollama response.
+
+        :param result: The decoded JSON response body.
+        :return: The response content or None if it is missing or empty.
+        """
+        # Check if the response contains the expected data
+        if "response" not in result:
+            logger.error("Invalid response structure from Ollama API.")
+            return None
+
+        content = result["response"].strip()
+        if not content:
+            logger.error("Empty content received in the response from Ollama API.")
+            return None
+
+        logger.debug(f"Content received: {content}")
+        return content
+
+    @transient_retry(_TRANSIENT_ERRORS)
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """
+        Post to /api/generate, retrying connection errors and timeouts with backoff.
+        """
+        return self.session.post(f"{self.base_url}/api/generate", json=payload)
+
+    @transient_retry(_ASYNC_TRANSIENT_ERRORS)
+    async def _apost(self, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        Asynchronously post to /api/generate, retrying transport errors with backoff.
+        """
+        return await get_async_client().post(f"{self.base_url}/api/generate", json=payload, timeout=None)
+
+    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
         """
         Send a message to the Ollama API and retrieve the response.
 
         :param prompt: The prompt to send to Ollama.
         :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
         :return: The response content from Ollama or None if the call fails.
         """
         try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
             logger.debug("Sending prompt to Ollama API.")
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False
-            }
-
-            response = requests.post(f"{self.base_url}/api/generate", json=payload)
-
-
+            payload = self._build_payload(prompt, stop_sequence, json_mode)
+            response = self._post(payload)
 
             # Check for response status
             if response.status_code != 200:
                 logger.error(f"Failed to get a valid response from Ollama API: {response.status_code} {response.text}")
                 return None
 
-            result = response.json()
+            return self._cache_store(cache_key, self._parse_response(response.json()))
 
-            # Check if the response contains the expected data
-            if "text" not in result:
-                logger.error("Invalid response structure from Ollama API.")
-                return None
+        except Exception as e:
+            logger.error(f"Error during Ollama API call: {e}")
+            return None
+
+    async def asend_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
+        """
+        Asynchronously send a message to the Ollama API over the shared httpx.AsyncClient.
+
+        :param prompt: The prompt to send to Ollama.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
+        :return: The response content from Ollama or None if the call fails.
+        """
+        try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+            logger.debug("Sending prompt to Ollama API (async).")
+            response = await self._apost(self._build_payload(prompt, stop_sequence, json_mode))
 
-            content = result["text"].strip()
-            if not content:
-                logger.error("Empty content received in the response from Ollama API.")
+            if response.status_code != 200:
+                logger.error(f"Failed to get a valid response from Ollama API: {response.status_code} {response.text}")
                 return None
 
-            logger.debug(f"Content received: {content}")
-            return content
-            
+            return self._cache_store(cache_key, self._parse_response(response.json()))
+
         except Exception as e:
             logger.error(f"Error during Ollama API call: {e}")
             return None
+
+    def stream_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Send a message to the Ollama API and yield the response text as it is generated.
+
+        :param prompt: The prompt to send to Ollama.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :return: Iterator over the generated text fragments.
+        """
+        try:
+            logger.debug("Streaming prompt to Ollama API.")
+            payload = self._build_payload(prompt, stop_sequence, stream=True)
+            with self.session.post(f"{self.base_url}/api/generate", json=payload, stream=True) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to get a valid response from Ollama API: {response.status_code} {response.text}")
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            logger.error(f"Error during Ollama API streaming call: {e}")
@@ -1,14 +1,25 @@
 # providers/openai_provider.py
 
 import logging
-import openai  # Make sure the OpenAI library is installed
+import time
+import asyncio
+import tempfile
+import os
+import orjson
+from openai import OpenAI, AsyncOpenAI, NOT_GIVEN  # Make sure the OpenAI library is installed
+from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from providers.api_provider import APIProvider
-from typing import Optional, List, Dict, Any
+from providers._retry import transient_retry
+from providers._http import get_client, get_async_client
+from typing import Optional, List, Dict, Any, Iterator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx responses
+_TRANSIENT_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
 class OpenAIProvider(APIProvider):
     """
     A modular provider for interacting with the OpenAI API.
@@ -27,8 +38,14 @@ class OpenAIProvider(APIProvider):
             if not api_key:
                 logger.error("OpenAI API key is missing.")
                 raise ValueError("OpenAI API key is missing.")
-            openai.api_key = api_key  # Set the OpenAI API key
-            
+            # Share the process-wide pooled keep-alive HTTP client across all providers;
+            # retries are handled by transient_retry rather than the SDK
+            self.client = OpenAI(api_key=api_key, http_client=get_client(), max_retries=0)
+            self.api_key = api_key
+            # Created on first async use and rebuilt if the event loop changes
+            self.async_client: Optional[AsyncOpenAI] = None
+            self._async_http_client = None
+
             self.model_name = config.get("model_name", "gpt-3.5-turbo")  # Default to GPT-3.5 Turbo
             self.temperature = config.get("temperature", 0.7)
             self.max_output_tokens = config.get("max_output_tokens", 150)  # Adjust max tokens as needed
@@ -38,38 +55,209 @@ class OpenAIProvider(APIProvider):
             logger.error(f"Failed to initialize OpenAIProvider: {e}")
             raise
 
-    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Optional[str]:
+    @transient_retry(_TRANSIENT_ERRORS)
+    def _create_completion(self, **kwargs):
+        """
+        Create a chat completion, retrying transient OpenAI API errors with backoff.
+        """
+        return self.client.chat.completions.create(**kwargs)
+
+    @transient_retry(_TRANSIENT_ERRORS)
+    async def _acreate_completion(self, **kwargs):
+        """
+        Asynchronously create a chat completion, retrying transient OpenAI API errors with backoff.
+        """
+        return await self.async_client.chat.completions.create(**kwargs)
+
+    def _extract_content(self, response) -> Optional[str]:
+        """
+        Extract the generated text from a chat completion response.
+
+        :param response: The chat completion returned by the OpenAI SDK.
+        :return: The response content or None if it is missing or empty.
+        """
+        if not response or not hasattr(response, 'choices') or not response.choices:
+            logger.error("Invalid or empty response structure from OpenAI API.")
+            return None
+
+        content = response.choices[0].message.content.strip()
+        if not content:
+            logger.error("Empty content received in the response from OpenAI API.")
+            return None
+        
+        logger.debug(f"Content received: {content}")
+        return content
+
+    def send_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
         """
         Send a message to the OpenAI API and retrieve the response.
 
         :param prompt: The prompt to send to OpenAI.
         :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
         :return: The response content from OpenAI or None if the call fails.
         """
         try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
             logger.debug("Sending prompt to OpenAI API.")
             
-            response = openai.chat.completions.create(
+            response = self._create_completion(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_output_tokens,
-                stop=stop_sequence
+                stop=stop_sequence,
+                response_format={"type": "json_object"} if json_mode else NOT_GIVEN
             )
             logger.debug("Received response from OpenAI API.")
+            return self._cache_store(cache_key, self._extract_content(response))
+            
+        except Exception as e:
+            logger.error(f"Error during OpenAI API call: {e}")
+            return None
 
-            if not response or not hasattr(response, 'choices') or not response.choices:
-                logger.error("Invalid or empty response structure from OpenAI API.")
-                return None
+    async def asend_message(self, prompt: str, stop_sequence: Optional[List[str]] = None, json_mode: bool = False) -> Optional[str]:
+        """
+        Asynchronously send a message to the OpenAI API using the AsyncOpenAI client.
+
+        :param prompt: The prompt to send to OpenAI.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :param json_mode: Ask the model to reply with a single JSON object.
+        :return: The response content from OpenAI or None if the call fails.
+        """
+        try:
+            cache_key = self._cache_key(prompt, stop_sequence, json_mode)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+            http_client = get_async_client()
+            if self.async_client is None or self._async_http_client is not http_client:
+                self.async_client = AsyncOpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+                self._async_http_client = http_client
+            logger.debug("Sending prompt to OpenAI API (async).")
+            response = await self._acreate_completion(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=self.max_output_tokens,
+                stop=stop_sequence,
+                response_format={"type": "json_object"} if json_mode else NOT_GIVEN
+            )
+            logger.debug("Received response from OpenAI API.")
+            return self._cache_store(cache_key, self._extract_content(response))
 
-            content = response.choices[0].message.content.strip()
-            if not content:
-                logger.error("Empty content received in the response from OpenAI API.")
-                return None
-            
-            logger.debug(f"Content received: {content}")
-            return content
-            
         except Exception as e:
             logger.error(f"Error during OpenAI API call: {e}")
             return None
+
+    def stream_message(self, prompt: str, stop_sequence: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Send a message to the OpenAI API and yield the response text as it is generated.
+
+        :param prompt: The prompt to send to OpenAI.
+        :param stop_sequence: Optional list of stop sequences to terminate the LLM response.
+        :return: Iterator over the generated text fragments.
+        """
+        try:
+            logger.debug("Streaming prompt to OpenAI API.")
+            stream = self._create_completion(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=self.max_output_tokens,
+                stop=stop_sequence,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Error during OpenAI API streaming call: {e}")
+
+    def submit_batch(self, prompts: List[str], poll_interval: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Run prompts through the OpenAI Batch API (/v1/batches) and wait for the results.
+        Batch jobs are cheaper and have higher throughput limits, at the cost of latency,
+        which suits offline preprocessing runs.
+
+        :param prompts: The prompts to send.
+        :param poll_interval: Seconds between job status checks; defaults to the
+                              'batch_poll_interval' setting, or 60.
+        :return: The response for each prompt, in order (None where the request failed).
+        """
+        results: List[Optional[str]] = [None] * len(prompts)
+        poll_interval = poll_interval or self.config.get('batch_poll_interval', 60)
+        batch_path = None
+        try:
+            with tempfile.NamedTemporaryFile('wb', suffix='.jsonl', delete=False) as f:
+                batch_path = f.name
+                for idx, prompt in enumerate(prompts):
+                    f.write(orjson.dumps({
+                        "custom_id": str(idx),
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model_name,
+                            "messages": [{"role": "user", "content": prompt}],
+                            "temperature": self.temperature,
+                            "max_tokens": self.max_output_tokens
+                        }
+                    }, option=orjson.OPT_APPEND_NEWLINE))
+
+            with open(batch_path, 'rb') as f:
+                batch_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} requests.")
+
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+                logger.debug(f"OpenAI batch {batch.id} status: {batch.status}")
+
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.error(f"OpenAI batch {batch.id} ended with status '{batch.status}'.")
+                return results
+
+            output = self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line:
+                    continue
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    logger.warning(f"Batch request {item.get('custom_id')} failed: {item.get('error')}")
+                    continue
+                choices = response.get("body", {}).get("choices") or []
+                if choices:
+                    content = (choices[0].get("message", {}).get("content") or "").strip()
+                    results[int(item["custom_id"])] = content or None
+
+            logger.info(f"OpenAI batch {batch.id} completed.")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error during OpenAI batch run: {e}")
+            return results
+        finally:
+            if batch_path and os.path.exists(batch_path):
+                os.remove(batch_path)
+
+    async def process_batch(self, prompts: List[str], concurrency_limit: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Send many prompts, through the Batch API when 'provider_mode' is 'batch'
+        and as concurrent chat completions otherwise.
+
+        :param prompts: The prompts to send.
+        :param concurrency_limit: Maximum number of concurrent requests in online mode.
+        :return: The response for each prompt, in order (None where the call failed).
+        """
+        if self.config.get('provider_mode') == 'batch':
+            return await asyncio.to_thread(self.submit_batch, prompts)
+        return await super().process_batch(prompts, concurrency_limit)
@@ -0,0 +1,164 @@
+# providers/response_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Backends shared by every provider, keyed by their settings
+_CACHES: Dict[tuple, 'CacheBackend'] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+class CacheBackend(Protocol):
+    """
+    Storage interface for cached LLM responses.
+    """
+
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+
+class MemoryCache:
+    """
+    In-process LRU cache of LLM responses.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the memory cache.
+        :param max_entries: Number of responses kept before the least recently used is evicted.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """
+    File-backed cache of LLM responses that survives across runs.
+    """
+
+    def __init__(self, path: str = "data/cache/llm_responses.sqlite"):
+        """
+        Initialize the SQLite cache, creating the database file if needed.
+        :param path: Path to the SQLite database file.
+        """
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._conn.commit()
+
+
+def cache_key(
+    model: str,
+    prompt: str,
+    temperature: float,
+    stop: Optional[List[str]] = None,
+    **params: Any
+) -> Optional[str]:
+    """
+    Build the cache key for a request.
+    Sampled (temperature > 0) responses are not reproducible, so they get no key.
+
+    :param model: Model name.
+    :param prompt: The prompt sent to the model.
+    :param temperature: Sampling temperature.
+    :param stop: Optional stop sequences.
+    :param params: Any other generation settings that affect the output.
+    :return: A sha256 hex digest, or None if the request should not be cached.
+    """
+    if temperature and temperature > 0:
+        return None
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "temperature": temperature, "stop": stop, **params},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cache(cache_config: Optional[Dict[str, Any]]) -> Optional[CacheBackend]:
+    """
+    Return the shared cache backend described by a provider's 'cache' settings.
+
+    :param cache_config: Dictionary with 'backend' ('memory' or 'sqlite') and backend options,
+                         or None to disable caching.
+    :return: The cache backend, or None if caching is disabled.
+    """
+    if not cache_config:
+        return None
+    backend = cache_config.get('backend', 'memory').lower()
+    if backend == 'memory':
+        settings = ('memory', cache_config.get('max_entries', 10000))
+    elif backend == 'sqlite':
+        settings = ('sqlite', cache_config.get('path', "data/cache/llm_responses.sqlite"))
+    else:
+        raise ValueError(f"Cache backend '{backend}' is not supported.")
+
+    with _CACHES_LOCK:
+        cache = _CACHES.get(settings)
+        if cache is None:
+            cache = MemoryCache(settings[1]) if backend == 'memory' else SQLiteCache(settings[1])
+            _CACHES[settings] = cache
+            logger.info(f"Initialized {backend} response cache.")
+        return cache
@@ -1,16 +1,35 @@
 import logging
+import os
 from sklearn.feature_extraction.text import TfidfVectorizer
-from collections import defaultdict
+from collections import Counter, defaultdict
 import re
 import pickle
+from bisect import bisect_left
+from multiprocessing import Pool
+from functools import lru_cache
 from underthesea import word_tokenize  # Replace with appropriate tokenizer if needed
 from difflib import get_close_matches
+import numpy as np
 import pandas as pd
 
+# RapidFuzz scores candidates in C; difflib is the pure-Python fallback
+try:
+    from rapidfuzz import fuzz, process
+    _HAS_RAPIDFUZZ = True
+except ImportError:
+    _HAS_RAPIDFUZZ = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mention and ID patterns, compiled once rather than on every search
+_PARTIAL_PATTERN = re.compile(
+    r"(Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định)\s+\d{1,3}/\d{4}(?:/[\w\-]+)?",
+    re.UNICODE | re.IGNORECASE
+)
+_ID_PATTERN = re.compile(r"\d{1,3}/\d{4}(?:/[A-Za-z\-]+)?")
+
 # Class for Document Retrieval
 class DocRetriever:
     def __init__(self, config):
@@ -19,61 +38,119 @@ class DocRetriever:
         self.token_db_path = self.config['processing'].get('token_db', 'data/token_db.pkl')
         self.df = None
         self.token_db = None
+        self.inverted_index = None
+        self._id_index = None
+        self._sorted_ids = None
         self._load_or_create_token_database()
 
+    def _load_document_database(self):
+        """
+        Load the document database and index it by lowercased Document_ID.
+        """
+        self.df = read_document_database(self.document_db_path)
+        self.df['_did_lower'] = self.df['Document_ID'].str.lower()
+        self._id_index = build_id_index(self.df)
+        self._sorted_ids = sorted(self._id_index)
+
     def _load_or_create_token_database(self):
         """
-        Load an existing token database from a pickle file, or create a new one if not present.
+        Load an existing token database and trigram index from a pickle file, or create
+        new ones if not present. Older pickles holding only the token database get the
+        trigram index built and saved alongside it.
         """
         if os.path.exists(self.token_db_path):
-            logging.debug("Loading token database from pickle file.")
+            logger.debug("Loading token database from pickle file.")
             with open(self.token_db_path, 'rb') as f:
-                self.token_db = pickle.load(f)
+                data = pickle.load(f)
+            if isinstance(data, tuple):
+                self.token_db, inverted_index = data
+                # Indexes saved before NaN Document_IDs were skipped may still hold them
+                self.inverted_index = {
+                    trigram: [doc_id for doc_id in doc_ids if isinstance(doc_id, str)]
+                    for trigram, doc_ids in inverted_index.items()
+                }
+                return
+            self.token_db = data
+            logger.debug("Token database has no trigram index; building it.")
+            self._load_document_database()
         else:
-            logging.debug("Creating new token database from document database.")
-            self.df = pd.read_csv(self.document_db_path)
-            documents = self.df['Full Name'].tolist()
-            self.token_db = self.create_token_database(documents, apply_tfidf=True)
-            with open(self.token_db_path, 'wb') as f:
-                pickle.dump(self.token_db, f)
-            logging.debug("Token database created and saved.")
+            logger.debug("Creating new token database from document database.")
+            self._load_document_database()
+        # Tokenize every name once and share the result between both structures
+        documents = self.df['Full Name'].tolist()
+        tokenized_docs = tokenize_documents(documents, self.config['processing'].get('tokenize_workers'))
+        if self.token_db is None:
+            self.token_db = self.create_token_database(documents, apply_tfidf=True, tokenized_docs=tokenized_docs)
+        self.inverted_index = self.create_inverted_index(self.df, tokenized_docs=tokenized_docs)
+        with open(self.token_db_path, 'wb') as f:
+            pickle.dump((self.token_db, self.inverted_index), f)
+        logger.debug("Token database created and saved.")
 
     @staticmethod
-    def create_token_database(documents, apply_tfidf=False):
+    def create_token_database(documents, apply_tfidf=False, tokenized_docs=None):
         """
         Create a token frequency database from a list of documents, with optional TF-IDF weighting.
         
         Args:
             documents (list of str): List of text documents.
             apply_tfidf (bool): Whether to apply TF-IDF weighting to the tokens.
+            tokenized_docs (list of list of str or None): Tokens of each document, as returned
+                by tokenize_documents. Tokenized here when not given.
             
         Returns:
             dict: A dictionary where keys are tokens and values are their frequency or TF-IDF score.
         """
-        logging.debug("Starting tokenization of documents.")
-        tokenized_docs = [' '.join(word_tokenize(doc.lower())) for doc in documents]
+        if tokenized_docs is None:
+            tokenized_docs = tokenize_documents(documents)
+        tokenized_docs = [' '.join(tokens) for tokens in tokenized_docs]
         
         if apply_tfidf:
-            logging.debug("Applying TF-IDF weighting.")
-            vectorizer = TfidfVectorizer()
+            logger.debug("Applying TF-IDF weighting.")
+            vectorizer = TfidfVectorizer(dtype=np.float32)
             tfidf_matrix = vectorizer.fit_transform(tokenized_docs)
             feature_names = vectorizer.get_feature_names_out()
             
-            tfidf_scores = {}
-            for idx, token in enumerate(feature_names):
-                tfidf_scores[token] = tfidf_matrix[:, idx].sum()
-            logging.debug("TF-IDF token database created.")
+            # Sum every column in one pass over the sparse matrix rather than slicing column by column
+            column_sums = np.asarray(tfidf_matrix.sum(axis=0)).ravel()
+            tfidf_scores = dict(zip(feature_names, column_sums.tolist()))
+            logger.debug("TF-IDF token database created.")
             return tfidf_scores
         else:
-            logging.debug("Creating token frequency dictionary.")
+            logger.debug("Creating token frequency dictionary.")
             token_freq = defaultdict(int)
             for doc in tokenized_docs:
                 tokens = doc.split()
                 for token in tokens:
                     token_freq[token] += 1
-            logging.debug("Token frequency dictionary created.")
+            logger.debug("Token frequency dictionary created.")
             return dict(token_freq)
 
+    @staticmethod
+    def create_inverted_index(df, tokenized_docs=None):
+        """
+        Create an inverted index from the trigrams of each document's Full Name.
+        
+        Args:
+            df (pd.DataFrame): The DataFrame containing document data.
+            tokenized_docs (list of list of str or None): Tokens of each Full Name, as returned
+                by tokenize_documents. Tokenized here when not given.
+            
+        Returns:
+            dict: A mapping of trigrams to the Document_IDs whose names contain them.
+        """
+        logger.debug("Building trigram inverted index.")
+        if tokenized_docs is None:
+            tokenized_docs = tokenize_documents(df['Full Name'].tolist())
+        inverted_index = defaultdict(list)
+        for tokens, doc_id in zip(tokenized_docs, df['Document_ID']):
+            # Rows without a Document_ID (NaN) cannot be returned as matches
+            if not isinstance(doc_id, str):
+                continue
+            for trigram in set(extract_trigrams(tokens)):
+                inverted_index[trigram].append(doc_id)
+        logger.debug("Trigram inverted index created.")
+        return dict(inverted_index)
+
     def search(self, query, top_n=5, fuzzy=False, cutoff=0.8, document_type=None):
         """
         Search for documents based on the given query.
@@ -88,14 +165,14 @@ class DocRetriever:
         Returns:
             dict: A mapping of matched mentions to lists of (Full Name, Document_ID) tuples.
         """
-        logging.debug("Starting document search.")
+        logger.debug("Starting document search.")
         if self.df is None:
-            self.df = pd.read_csv(self.document_db_path)
+            self._load_document_database()
         
-        return self.match_documents_comprehensive(query, self.token_db, {}, self.df, top_n, fuzzy, cutoff, document_type)
+        return self.match_documents_comprehensive(query, self.inverted_index, {}, self.df, top_n, fuzzy, cutoff, document_type, id_index=self._id_index, sorted_ids=self._sorted_ids)
 
     @staticmethod
-    def match_documents_comprehensive(text, inverted_index, document_types, df, top_n=5, fuzzy=False, cutoff=0.8, document_type=None):
+    def match_documents_comprehensive(text, inverted_index, document_types, df, top_n=5, fuzzy=False, cutoff=0.8, document_type=None, id_index=None, sorted_ids=None):
         """
         Comprehensive matching function combining rule-based and NLP approaches.
         
@@ -108,134 +185,228 @@ class DocRetriever:
             fuzzy (bool): Whether to use fuzzy matching.
             cutoff (float): Threshold for fuzzy matching.
             document_type (str or None): Specify the type of document to filter results.
+            id_index (dict or None): Lowercased Document_ID to row positions, as built by
+                build_id_index. Built from df when not given.
+            sorted_ids (list or None): The keys of id_index in sorted order, used to find
+                prefix matches by binary search. The column is scanned when not given.
             
         Returns:
             dict: A mapping of matched mentions to lists of (Full Name, Document_ID) tuples.
         """
-        logging.debug("Initializing matches dictionary.")
+        logger.debug("Initializing matches dictionary.")
+        if '_did_lower' in df:
+            lowered_ids = df['_did_lower']
+        else:
+            lowered_ids = df['Document_ID'].str.lower()
+        if id_index is None:
+            id_index = build_id_index(df)
+        # Plain column arrays: rows are read by position, never by masking df
+        full_names = df['Full Name'].to_numpy()
+        doc_ids = df['Document_ID'].to_numpy()
         matches = defaultdict(list)
         normalized_text = normalize_text(text)
         
-        logging.debug("Extracting mentions using regex.")
-        partial_pattern = re.compile(
-            r"(Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định)\s+\d{1,3}/\d{4}(?:/[\w\-]+)?",
-            re.UNICODE | re.IGNORECASE
-        )
-        
-        regex_matches = partial_pattern.finditer(normalized_text)
+        logger.debug("Extracting mentions using regex.")
+        regex_matches = _PARTIAL_PATTERN.finditer(normalized_text)
         mentions = set()
         for match in regex_matches:
             full_mention = match.group(0)
             mentions.add(full_mention)
-        logging.debug(f"Extracted mentions: {mentions}")
+        logger.debug("Extracted mentions: %s", mentions)
         
-        logging.debug("Tokenizing text and extracting trigrams.")
-        tokens = word_tokenize(normalized_text)
+        logger.debug("Tokenizing text and extracting trigrams.")
+        tokens = tokenize_query(normalized_text)
         trigrams = extract_trigrams(tokens)
-        logging.debug(f"Extracted trigrams: {trigrams}")
+        logger.debug("Extracted trigrams: %s", trigrams)
         
-        logging.debug("Retrieving candidate documents based on trigrams.")
-        candidate_docs = defaultdict(int)
+        logger.debug("Retrieving candidate documents based on trigrams.")
+        candidate_docs = Counter()
         for trigram in trigrams:
-            if trigram in inverted_index:
-                for doc_id in inverted_index[trigram]:
-                    candidate_docs[doc_id] += 1
-        logging.debug(f"Candidate documents: {candidate_docs}")
+            candidate_docs.update(inverted_index.get(trigram, ()))
+        logger.debug("Candidate documents: %s", candidate_docs)
         
-        logging.debug("Ranking candidates based on trigram matches.")
-        sorted_candidates = sorted(candidate_docs.items(), key=lambda x: x[1], reverse=True)
-        logging.debug(f"Sorted candidates: {sorted_candidates}")
+        logger.debug("Ranking candidates based on trigram matches.")
+        # Only the top_n are used, so select them with a heap instead of sorting every candidate
+        sorted_candidates = candidate_docs.most_common(top_n)
+        logger.debug("Sorted candidates: %s", sorted_candidates)
         
-        logging.debug("Applying matching rules for each mention.")
+        logger.debug("Applying matching rules for each mention.")
         first_category_keywords = {"luật", "bộ luật", "pháp lệnh"}
         for mention in mentions:
-            logging.debug(f"Processing mention: {mention}")
-            m = partial_pattern.match(mention)
+            logger.debug("Processing mention: %s", mention)
+            m = _PARTIAL_PATTERN.match(mention)
             if m:
                 doc_type = m.group(1).lower()
-                id_pattern = re.compile(r"\d{1,3}/\d{4}(?:/[A-Za-z\-]+)?")
-                id_match = id_pattern.search(mention)
+                id_match = _ID_PATTERN.search(mention)
                 partial_id = id_match.group(0).lower() if id_match else ""
-                logging.debug(f"Extracted doc_type: {doc_type}, partial_id: {partial_id}")
+                logger.debug("Extracted doc_type: %s, partial_id: %s", doc_type, partial_id)
                 if document_type and document_type.lower() != doc_type:
                     continue
                 if doc_type in first_category_keywords:
-                    logging.debug("Matching first category document.")
-                    exact_matches = df[df['Document_ID'].str.lower() == partial_id]
-                    if not exact_matches.empty:
-                        for _, row in exact_matches.iterrows():
-                            matches[mention].append((row['Full Name'], row['Document_ID']))
-                        logging.debug(f"Exact matches found: {matches[mention]}")
+                    logger.debug("Matching first category document.")
+                    exact_rows = id_index.get(partial_id)
+                    if exact_rows:
+                        for i in exact_rows:
+                            matches[mention].append((full_names[i], doc_ids[i]))
+                        logger.debug("Exact matches found: %s", matches[mention])
                         continue
                     if fuzzy and partial_id:
-                        logging.debug("Performing fuzzy match for partial ID.")
-                        possible_ids = get_close_matches(partial_id, df['Document_ID'].str.lower(), n=top_n, cutoff=cutoff)
+                        logger.debug("Performing fuzzy match for partial ID.")
+                        possible_ids = close_matches(partial_id, lowered_ids, n=top_n, cutoff=cutoff)
                         for pid in possible_ids:
-                            matched_doc = df[df['Document_ID'].str.lower() == pid]
-                            if not matched_doc.empty:
-                                matches[mention].append((matched_doc.iloc[0]['Full Name'], matched_doc.iloc[0]['Document_ID']))
-                        logging.debug(f"Fuzzy matches found: {matches[mention]}")
+                            rows = id_index.get(pid)
+                            if rows:
+                                matches[mention].append((full_names[rows[0]], doc_ids[rows[0]]))
+                        logger.debug("Fuzzy matches found: %s", matches[mention])
                         if possible_ids:
                             continue
                     if partial_id:
-                        logging.debug("Performing partial ID match using regex.")
-                        partial_id_pattern = re.compile(re.escape(partial_id) + r'.*')
-                        partial_matches = df[df['Document_ID'].str.lower().str.match(partial_id_pattern)]
-                        if not partial_matches.empty:
-                            for _, row in partial_matches.iterrows():
-                                matches[mention].append((row['Full Name'], row['Document_ID']))
-                            logging.debug(f"Partial matches found: {matches[mention]}")
+                        logger.debug("Performing partial ID match by prefix.")
+                        if sorted_ids is not None:
+                            partial_rows = prefix_rows(sorted_ids, id_index, partial_id)
+                        else:
+                            partial_rows = np.flatnonzero(lowered_ids.str.startswith(partial_id, na=False).to_numpy())
+                        if len(partial_rows):
+                            for i in partial_rows:
+                                matches[mention].append((full_names[i], doc_ids[i]))
+                            logger.debug("Partial matches found: %s", matches[mention])
                             continue
                 else:
-                    logging.debug("Matching second category document.")
-                    exact_matches = df[df['Document_ID'].str.lower() == partial_id]
-                    if not exact_matches.empty:
-                        for _, row in exact_matches.iterrows():
-                            matches[mention].append((row['Full Name'], row['Document_ID']))
-                        logging.debug(f"Exact matches found: {matches[mention]}")
+                    logger.debug("Matching second category document.")
+                    exact_rows = id_index.get(partial_id)
+                    if exact_rows:
+                        for i in exact_rows:
+                            matches[mention].append((full_names[i], doc_ids[i]))
+                        logger.debug("Exact matches found: %s", matches[mention])
                         continue
                     if fuzzy and partial_id:
-                        logging.debug("Performing fuzzy match for partial ID.")
-                        possible_ids = get_close_matches(partial_id, df['Document_ID'].str.lower(), n=top_n, cutoff=cutoff)
+                        logger.debug("Performing fuzzy match for partial ID.")
+                        possible_ids = close_matches(partial_id, lowered_ids, n=top_n, cutoff=cutoff)
                         for pid in possible_ids:
-                            matched_doc = df[df['Document_ID'].str.lower() == pid]
-                            if not matched_doc.empty:
-                                matches[mention].append((matched_doc.iloc[0]['Full Name'], matched_doc.iloc[0]['Document_ID']))
-                        logging.debug(f"Fuzzy matches found: {matches[mention]}")
+                            rows = id_index.get(pid)
+                            if rows:
+                                matches[mention].append((full_names[rows[0]], doc_ids[rows[0]]))
+                        logger.debug("Fuzzy matches found: %s", matches[mention])
                         if possible_ids:
                             continue
                     if partial_id:
-                        logging.debug("Performing partial ID match using regex.")
-                        partial_id_pattern = re.compile(re.escape(partial_id) + r'.*')
-                        partial_matches = df[df['Document_ID'].str.lower().str.match(partial_id_pattern)]
-                        if not partial_matches.empty:
-                            for _, row in partial_matches.iterrows():
-                                matches[mention].append((row['Full Name'], row['Document_ID']))
-                            logging.debug(f"Partial matches found: {matches[mention]}")
+                        logger.debug("Performing partial ID match by prefix.")
+                        if sorted_ids is not None:
+                            partial_rows = prefix_rows(sorted_ids, id_index, partial_id)
+                        else:
+                            partial_rows = np.flatnonzero(lowered_ids.str.startswith(partial_id, na=False).to_numpy())
+                        if len(partial_rows):
+                            for i in partial_rows:
+                                matches[mention].append((full_names[i], doc_ids[i]))
+                            logger.debug("Partial matches found: %s", matches[mention])
                             continue
         if not any(matches.values()):
-            logging.debug("Checking for trigram-based candidates.")
-            for doc_id, count in sorted_candidates[:top_n]:
-                matched_doc = df[df['Document_ID'].str.lower() == doc_id.lower()]
-                if not matched_doc.empty:
+            logger.debug("Checking for trigram-based candidates.")
+            for doc_id, count in sorted_candidates:
+                rows = id_index.get(doc_id.lower())
+                if rows:
                     mention = f"Candidate Match for Trigram: {doc_id}"
-                    matches[mention].append((matched_doc.iloc[0]['Full Name'], matched_doc.iloc[0]['Document_ID']))
-            logging.debug(f"Trigram-based matches found: {matches}")
+                    matches[mention].append((full_names[rows[0]], doc_ids[rows[0]]))
+            logger.debug("Trigram-based matches found: %s", matches)
         return matches
 
 # Utility functions
+def read_document_database(csv_path):
+    """
+    Read the document database CSV through a Parquet copy kept next to it.
+    Parsing the CSV dominates start-up, so it is parsed once and the columnar copy is
+    read on later runs, until the CSV is modified. Without a Parquet engine (pyarrow or
+    fastparquet) the CSV is read directly.
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        try:
+            return pd.read_parquet(parquet_path)
+        except Exception as e:
+            logger.warning(f"Could not read '{parquet_path}', falling back to CSV: {e}")
+    df = pd.read_csv(csv_path)
+    try:
+        df.to_parquet(parquet_path, index=False)
+        logger.debug("Cached document database as '%s'.", parquet_path)
+    except Exception as e:
+        logger.debug("Not caching document database as Parquet: %s", e)
+    return df
+
+def build_id_index(df):
+    """
+    Map each lowercased Document_ID to the positions of its rows in df, so exact ID
+    lookups are a dict probe instead of a scan over the whole column.
+    """
+    index = defaultdict(list)
+    for position, doc_id in enumerate(df['Document_ID'].str.lower()):
+        if isinstance(doc_id, str):
+            index[doc_id].append(position)
+    return dict(index)
+
+def prefix_rows(sorted_ids, id_index, prefix):
+    """
+    Return the positions, in row order, of documents whose lowercased ID starts with prefix.
+    Keys sharing a prefix are contiguous in sorted order, so this bisects to the first one
+    and stops at the first key that no longer matches.
+    """
+    rows = []
+    for i in range(bisect_left(sorted_ids, prefix), len(sorted_ids)):
+        if not sorted_ids[i].startswith(prefix):
+            break
+        rows.extend(id_index[sorted_ids[i]])
+    return sorted(rows)
+
 def normalize_text(text):
     """
     Normalize the text by lowercasing and removing extra spaces.
     """
     return ' '.join(text.lower().split())
 
+def _tokenize_document(document):
+    return word_tokenize(normalize_text(document))
+
+def tokenize_documents(documents, workers=1):
+    """
+    Tokenize a list of documents. word_tokenize is CPU-bound, so the work can be
+    spread over a process pool by setting processing.tokenize_workers. A pool is
+    only started when that is set explicitly; scripts doing so on platforms that
+    spawn workers (Windows, macOS) must build the database under an
+    `if __name__ == '__main__'` guard.
+    
+    Args:
+        documents (list of str): List of text documents.
+        workers (int or None): Number of worker processes; 1 or None tokenizes in
+            the current process.
+        
+    Returns:
+        list of list of str: The tokens of each document, in input order.
+    """
+    workers = workers or 1
+    logger.debug("Tokenizing %s documents with %s workers.", len(documents), workers)
+    if workers == 1 or len(documents) < 2 * workers:
+        return [_tokenize_document(doc) for doc in documents]
+    with Pool(workers) as pool:
+        return pool.map(_tokenize_document, documents, chunksize=max(1, len(documents) // (workers * 4)))
+
+@lru_cache(maxsize=4096)
+def tokenize_query(normalized_text):
+    """
+    Tokenize a normalized query, memoized because repeated queries are common and
+    word_tokenize is the slowest step of a search.
+    """
+    return tuple(word_tokenize(normalized_text))
+
+def close_matches(word, possibilities, n=3, cutoff=0.6):
+    """
+    Return the best matches for word among possibilities, like difflib.get_close_matches.
+    """
+    if not _HAS_RAPIDFUZZ:
+        return get_close_matches(word, possibilities, n=n, cutoff=cutoff)
+    results = process.extract(word, possibilities, scorer=fuzz.ratio, limit=n, score_cutoff=cutoff * 100)
+    return [match for match, _, _ in results]
+
 def extract_trigrams(tokens):
     """
     Extract trigrams from a list of tokens.
     """
-    trigrams = []
-    for i in range(len(tokens) - 2):
-        trigram = ' '.join(tokens[i:i+3])
-        trigrams.append(trigram)
-    return trigrams
\ No newline at end of file
+    return [f"{a} {b} {c}" for a, b, c in zip(tokens, tokens[1:], tokens[2:])]
\ No newline at end of file
@@ -1,18 +1,13 @@
 # post_processing.py
 
 import logging
-from tqdm import tqdm
-import json
 import os
 import sys
-from typing import Optional, Dict, Any, Tuple
+from typing import Tuple
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.file_handler import read_input_file, output_2_jsonl, load_record
 from utils.validation import load_schema, validate_record, is_english
 from utils.load_config import load_config
-from providers import ProviderFactory  # Ensure providers are properly structured
-from utils.retry_handler import retry
 from utils.llm_formatter import LLMFormatter
 
 
@@ -56,9 +56,10 @@ class Preprocessor:
         :return: Dictionary representing the preprocessing schema.
         """
         try:
-            schema_path = self.config['processing']['schema_paths']['pre_processing_schema']
-            schema = load_schema(schema_path)  # Ensure load_schema is properly implemented
-            logger.info(f"Preprocessing schema loaded from '{schema_path}'.")
+            # Kept for process_record, so the path is not looked up again for every record
+            self.schema_path = self.config['processing']['schema_paths']['pre_processing_schema']
+            schema = load_schema(self.schema_path)  # Ensure load_schema is properly implemented
+            logger.info(f"Preprocessing schema loaded from '{self.schema_path}'.")
             return schema
         except KeyError as ke:
             logger.error(f"Missing key in configuration: {ke}")
@@ -80,8 +81,9 @@ class Preprocessor:
                 original_content = record.content
                 record.content = mask_api_key(record.content)
                 logger.debug(f"Record ID {record.record_id}: Masked PII.")
-                logger.debug(f"Original Content: {original_content}")
-                logger.debug(f"Masked Content: {record.content}")
+                # Lazy formatting: full record contents are only copied into a message when DEBUG is on
+                logger.debug("Original Content: %s", original_content)
+                logger.debug("Masked Content: %s", record.content)
 
             # Add more preprocessing steps as per requirements
             # Example: clean_text, remove_stopwords, etc.
@@ -105,10 +107,9 @@ class Preprocessor:
             logger.debug(f"Record ID {preprocessed_record.record_id} preprocessed.")
 
             # Validate preprocessed data
-            schema_path = self.config['processing']['schema_paths']['pre_processing_schema']
             is_valid = validate_record(
                 record=preprocessed_record.to_dict(),
-                schema_path=schema_path,
+                schema_path=self.schema_path,
                 mode="preprocessing",
                 config=self.config
             )
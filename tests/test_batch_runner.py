@@ -0,0 +1,69 @@
+# tests/test_batch_runner.py
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from providers.batch_runner import load_completed_ids, process_batch
+
+
+class FakeProvider:
+    """Echoes each prompt back and records what was sent."""
+
+    def __init__(self):
+        self.rate_limiter = None
+        self.sent = []
+
+    async def asend_message(self, prompt, stop_sequence=None, json_mode=False):
+        self.sent.append(prompt)
+        return f"reply to {prompt}"
+
+
+class TestProcessBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_jsonl = os.path.join(self.tmp_dir.name, "results.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_results(self):
+        with open(self.output_jsonl, 'rb') as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+
+    def test_resume_from_truncated_checkpoint(self):
+        # 'a' completed; 'b' was cut off mid-write, leaving no trailing newline
+        with open(self.output_jsonl, 'wb') as f:
+            f.write(orjson.dumps({"custom_id": "a", "response": "reply to pa"}) + b'\n')
+            f.write(b'{"custom_id": "b", "resp')
+
+        provider = FakeProvider()
+        records = [{"custom_id": cid, "prompt": f"p{cid}"} for cid in ("a", "b", "c")]
+        completed = asyncio.run(process_batch(provider, records, self.output_jsonl))
+
+        self.assertEqual(completed, 2)
+        self.assertCountEqual(provider.sent, ["pb", "pc"])
+        self.assertEqual(load_completed_ids(self.output_jsonl), {"a", "b", "c"})
+
+        # A second resume finds everything done and sends nothing
+        provider = FakeProvider()
+        self.assertEqual(asyncio.run(process_batch(provider, records, self.output_jsonl)), 0)
+        self.assertEqual(provider.sent, [])
+
+    def test_duplicate_custom_ids_sent_once(self):
+        provider = FakeProvider()
+        records = [{"custom_id": "a", "prompt": "pa"}, {"custom_id": "a", "prompt": "pa"}]
+        completed = asyncio.run(process_batch(provider, records, self.output_jsonl))
+
+        self.assertEqual(completed, 1)
+        self.assertEqual(provider.sent, ["pa"])
+        self.assertEqual([r["custom_id"] for r in self.read_results()], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# tests/test_file_handler.py
+
+import random
+import re
+import tempfile
+import unittest
+from unittest import mock
+import sys
+import os
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import file_handler
+from utils.file_handler import _tagged_record_spans, output_2_jsonl
+
+# The pattern _tagged_record_spans replaces
+_RECORD_RE = re.compile(rb'<id=[^>]+>.*?</id=[^>]+>', re.DOTALL)
+
+
+def regex_spans(buf):
+    return [m.span() for m in _RECORD_RE.finditer(buf)]
+
+
+class TestTaggedRecordSpans(unittest.TestCase):
+    def spans(self, buf):
+        return list(_tagged_record_spans(buf))
+
+    def test_well_formed_records(self):
+        buf = b"<id=1>\n<title>A</title>\n</id=1>\n\n<id=2><title>B</title></id=2>"
+        spans = self.spans(buf)
+        self.assertEqual([buf[s:e] for s, e in spans], [
+            b"<id=1>\n<title>A</title>\n</id=1>",
+            b"<id=2><title>B</title></id=2>",
+        ])
+        self.assertEqual(spans, regex_spans(buf))
+
+    def test_unclosed_tag(self):
+        first = b"<id=1><title>A</title></id=1>"
+        buf = first + b"<id=2><title>B</title>"
+        self.assertEqual(self.spans(buf), [(0, len(first))])
+        self.assertEqual(self.spans(buf), regex_spans(buf))
+
+    def test_empty_id(self):
+        buf = b"<id=><content>x</content></id=1>"
+        self.assertEqual(self.spans(buf), [])
+        self.assertEqual(self.spans(buf), regex_spans(buf))
+        buf = b"<id=1>x</id=></id=1>"
+        self.assertEqual(self.spans(buf), [(0, len(buf))])
+        self.assertEqual(self.spans(buf), regex_spans(buf))
+
+    def test_nested_close_tags(self):
+        buf = b"<id=1><id=2>x</id=2></id=1>"
+        self.assertEqual(self.spans(buf), [(0, 20)])
+        self.assertEqual(self.spans(buf), regex_spans(buf))
+
+    def test_matches_regex_on_random_input(self):
+        pieces = [b'<id=', b'</id=', b'>', b'<', b'/', b'1', b'a', b'\n', b' ']
+        rng = random.Random(0)
+        for _ in range(20000):
+            buf = b''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(self.spans(buf), regex_spans(buf), buf)
+
+
+class TestOutput2Jsonl(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "out.jsonl")
+        file_handler._JSONL_ID_INDEX.clear()
+
+    def tearDown(self):
+        file_handler._JSONL_ID_INDEX.clear()
+        self.tmp_dir.cleanup()
+
+    def read_records(self):
+        with open(self.path, 'rb') as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+
+    def test_append_new_id_without_reading_file(self):
+        output_2_jsonl(self.path, {"record_id": "a", "content": "A"})
+        with mock.patch('builtins.open', wraps=open) as mocked_open, \
+                mock.patch.object(file_handler, '_rewrite_jsonl') as rewrite:
+            output_2_jsonl(self.path, {"record_id": "b", "content": "B"})
+        rewrite.assert_not_called()
+        modes = [c.args[1] if len(c.args) > 1 else c.kwargs.get('mode', 'r') for c in mocked_open.call_args_list]
+        self.assertEqual(modes, ['ab'])
+        self.assertEqual([r["record_id"] for r in self.read_records()], ["a", "b"])
+
+    def test_overwrite_existing_id_rewrites_file(self):
+        output_2_jsonl(self.path, [{"record_id": "a", "content": "A"}, {"record_id": "b", "content": "B"}])
+        with mock.patch.object(file_handler, '_rewrite_jsonl', wraps=file_handler._rewrite_jsonl) as rewrite:
+            output_2_jsonl(self.path, {"record_id": "a", "content": "A2"})
+        rewrite.assert_called_once()
+        self.assertEqual(self.read_records(), [
+            {"record_id": "a", "content": "A2"},
+            {"record_id": "b", "content": "B"},
+        ])
+
+    def test_external_edit_forces_rescan(self):
+        output_2_jsonl(self.path, {"record_id": "a", "content": "A"})
+        # Another process adds a record the in-memory index does not know about
+        with open(self.path, 'ab') as f:
+            f.write(orjson.dumps({"record_id": "b", "content": "B"}) + b'\n')
+        output_2_jsonl(self.path, {"record_id": "b", "content": "B2"})
+        self.assertEqual(self.read_records(), [
+            {"record_id": "a", "content": "A"},
+            {"record_id": "b", "content": "B2"},
+        ])
+
+    def test_file_without_trailing_newline(self):
+        with open(self.path, 'wb') as f:
+            f.write(orjson.dumps({"record_id": "a", "content": "A"}))
+        output_2_jsonl(self.path, {"record_id": "b", "content": "B"})
+        self.assertEqual([r["record_id"] for r in self.read_records()], ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
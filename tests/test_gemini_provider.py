@@ -0,0 +1,74 @@
+# tests/test_gemini_provider.py
+
+import importlib
+import types
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeGenAI(types.ModuleType):
+    """Stand-in for google.generativeai that records the key each model was built under."""
+
+    def __init__(self):
+        super().__init__('google.generativeai')
+        self.api_key = None
+        self.configure = mock.Mock(side_effect=self._configure)
+        self.GenerativeModel = mock.Mock(side_effect=self._model)
+        self.GenerationConfig = mock.Mock()
+
+    def _configure(self, api_key):
+        self.api_key = api_key
+
+    def _model(self, model_name):
+        return types.SimpleNamespace(model_name=model_name, api_key=self.api_key)
+
+
+class TestGeminiModelCache(unittest.TestCase):
+    def setUp(self):
+        self.genai = FakeGenAI()
+        exceptions = types.ModuleType('google.api_core.exceptions')
+        for name in ('ResourceExhausted', 'ServiceUnavailable', 'DeadlineExceeded', 'InternalServerError'):
+            setattr(exceptions, name, type(name, (Exception,), {}))
+        google = types.ModuleType('google')
+        google.generativeai = self.genai
+        api_core = types.ModuleType('google.api_core')
+        api_core.exceptions = exceptions
+        google.api_core = api_core
+        patcher = mock.patch.dict(sys.modules, {
+            'google': google,
+            'google.generativeai': self.genai,
+            'google.api_core': api_core,
+            'google.api_core.exceptions': exceptions,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sys.modules.pop('providers.gemini_provider', None)
+        self.addCleanup(sys.modules.pop, 'providers.gemini_provider', None)
+        self.gemini_provider = importlib.import_module('providers.gemini_provider')
+
+    def test_two_keys_get_two_distinct_models(self):
+        first = self.gemini_provider._get_model("key-1", "gemini-1.5-flash")
+        second = self.gemini_provider._get_model("key-2", "gemini-1.5-flash")
+        self.assertIsNot(first, second)
+        self.assertEqual(first.api_key, "key-1")
+        self.assertEqual(second.api_key, "key-2")
+        self.assertEqual([c.kwargs["api_key"] for c in self.genai.configure.call_args_list], ["key-1", "key-2"])
+
+    def test_same_key_and_model_reuses_handle(self):
+        first = self.gemini_provider._get_model("key-1", "gemini-1.5-flash")
+        self.assertIs(self.gemini_provider._get_model("key-1", "gemini-1.5-flash"), first)
+        self.genai.GenerativeModel.assert_called_once_with("gemini-1.5-flash")
+
+    def test_providers_with_different_keys_do_not_share_a_model(self):
+        provider_class = self.gemini_provider.GeminiProvider
+        first = provider_class({"api_key": "key-1", "model_name": "gemini-1.5-flash"}, "")
+        second = provider_class({"api_key": "key-2", "model_name": "gemini-1.5-flash"}, "")
+        self.assertEqual(first.model.api_key, "key-1")
+        self.assertEqual(second.model.api_key, "key-2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_rate_limiter.py
+
+import asyncio
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import rate_limiter
+from utils.rate_limiter import TokenBucket, get_shared_bucket
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limiter.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_up_to_capacity(self):
+        bucket = TokenBucket(capacity=3, refill_rate=1)
+        self.assertEqual([bucket._try_acquire() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket._try_acquire(), 1.0)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(capacity=2, refill_rate=0.5)
+        bucket._try_acquire()
+        bucket._try_acquire()
+        self.clock.advance(2)
+        self.assertEqual(bucket._try_acquire(), 0)
+        self.assertGreater(bucket._try_acquire(), 0)
+        self.clock.advance(100)
+        self.assertEqual([bucket._try_acquire() for _ in range(2)], [0, 0])
+        self.assertGreater(bucket._try_acquire(), 0)
+
+    def test_acquire_sleeps_until_token_is_due(self):
+        bucket = TokenBucket(capacity=1, refill_rate=2)
+        bucket.acquire()
+        with mock.patch.object(rate_limiter.time, 'sleep', side_effect=self.clock.advance) as sleep:
+            bucket.acquire()
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args.args[0], 0.5)
+
+    def test_acquire_async_waits_without_blocking(self):
+        bucket = TokenBucket(capacity=1, refill_rate=4)
+
+        async def fake_sleep(seconds):
+            self.clock.advance(seconds)
+
+        async def run():
+            await bucket.acquire_async()
+            await bucket.acquire_async()
+
+        with mock.patch.object(rate_limiter.asyncio, 'sleep', side_effect=fake_sleep) as sleep, \
+                mock.patch.object(rate_limiter.time, 'sleep') as blocking_sleep:
+            asyncio.run(run())
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args.args[0], 0.25)
+        blocking_sleep.assert_not_called()
+
+    def test_rejects_non_positive_settings(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=0, refill_rate=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=5, refill_rate=0)
+        with self.assertRaises(ValueError):
+            get_shared_bucket("test-zero-rpm", 0)
+
+
+class TestSharedBucket(unittest.TestCase):
+    def test_same_key_shares_bucket(self):
+        first = get_shared_bucket("test-key", 30)
+        self.assertIs(get_shared_bucket("test-key", 60), first)
+        self.assertIsNot(get_shared_bucket("test-other-key", 30), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
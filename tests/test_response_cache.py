@@ -0,0 +1,73 @@
+# tests/test_response_cache.py
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from providers import response_cache
+from providers.response_cache import MemoryCache, SQLiteCache, cache_key
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        self.assertEqual(cache.get("a"), "A")  # "b" is now the least recently used
+        cache.set("c", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_entries_expire_after_ttl(self):
+        cache = MemoryCache()
+        with mock.patch.object(response_cache.time, 'time', return_value=1000.0):
+            cache.set("a", "A", ttl=10)
+            cache.set("b", "B")
+        with mock.patch.object(response_cache.time, 'time', return_value=1005.0):
+            self.assertEqual(cache.get("a"), "A")
+        with mock.patch.object(response_cache.time, 'time', return_value=1011.0):
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), "B")
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache", "responses.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip_across_instances(self):
+        cache = SQLiteCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", "xin chào")
+        cache.set("k", "updated")
+        cache._conn.close()
+        self.assertEqual(SQLiteCache(self.path).get("k"), "updated")
+
+    def test_expired_entry_is_a_miss(self):
+        cache = SQLiteCache(self.path)
+        with mock.patch.object(response_cache.time, 'time', return_value=1000.0):
+            cache.set("k", "v", ttl=5)
+        with mock.patch.object(response_cache.time, 'time', return_value=1010.0):
+            self.assertIsNone(cache.get("k"))
+        cache._conn.close()
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_sampled_requests_are_not_cached(self):
+        self.assertIsNone(cache_key("model", "prompt", temperature=0.7))
+
+    def test_deterministic_requests_get_stable_keys(self):
+        key = cache_key("model", "prompt", temperature=0.0, stop=["\n"], json_mode=True)
+        self.assertEqual(key, cache_key("model", "prompt", temperature=0.0, json_mode=True, stop=["\n"]))
+        self.assertNotEqual(key, cache_key("model", "prompt", temperature=0.0, stop=["\n"], json_mode=False))
+        self.assertNotEqual(key, cache_key("other-model", "prompt", temperature=0.0, stop=["\n"], json_mode=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
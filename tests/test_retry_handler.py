@@ -0,0 +1,91 @@
+# tests/test_retry_handler.py
+
+import asyncio
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import retry_handler
+from utils.retry_handler import retry
+
+
+class TransientError(Exception):
+    pass
+
+
+class TestRetry(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(retry_handler.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_non_matching_exception_raises_immediately(self):
+        calls = []
+
+        @retry(max_attempts=3, exceptions=(TransientError,))
+        def fail():
+            calls.append(1)
+            raise ValueError("not retryable")
+
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(len(calls), 1)
+        self.sleep.assert_not_called()
+
+    def test_transient_error_retried_then_reraised(self):
+        calls = []
+
+        @retry(max_attempts=3, delay=1, backoff=2, exceptions=(TransientError,))
+        def fail():
+            calls.append(1)
+            raise TransientError("still down")
+
+        with self.assertRaises(TransientError):
+            fail()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2])
+
+    def test_recovers_after_transient_error(self):
+        outcomes = [TransientError("blip"), "ok"]
+
+        @retry(max_attempts=3, delay=1, exceptions=(TransientError,))
+        def flaky():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(flaky(), "ok")
+        self.sleep.assert_called_once()
+
+    def test_max_delay_and_jitter(self):
+        @retry(max_attempts=4, delay=5, backoff=10, max_delay=8, jitter=True, exceptions=(TransientError,))
+        def fail():
+            raise TransientError("down")
+
+        with mock.patch.object(retry_handler.random, 'uniform', side_effect=lambda low, high: high) as uniform:
+            with self.assertRaises(TransientError):
+                fail()
+        self.assertEqual([c.args for c in uniform.call_args_list], [(0, 5), (0, 8), (0, 8)])
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [5, 8, 8])
+
+    def test_async_path(self):
+        calls = []
+
+        @retry(max_attempts=2, delay=3, exceptions=(TransientError,))
+        async def fail():
+            calls.append(1)
+            raise TransientError("down")
+
+        self.assertTrue(asyncio.iscoroutinefunction(fail))
+        with mock.patch.object(retry_handler.asyncio, 'sleep', new=mock.AsyncMock()) as async_sleep:
+            with self.assertRaises(TransientError):
+                asyncio.run(fail())
+        self.assertEqual(len(calls), 2)
+        async_sleep.assert_awaited_once_with(3)
+        self.sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
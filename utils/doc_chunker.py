@@ -2,6 +2,7 @@ import os
 import re
 import json
 import logging
+from functools import lru_cache
 from glob import glob
 
 # Import necessary libraries for different file types
@@ -232,6 +233,18 @@ def assign_hierarchy_levels(detected_markers):
         level += 1
     return hierarchy_mapping
 
+@lru_cache(maxsize=None)
+def _combined_pattern(markers):
+    """
+    Combine the patterns of the given hierarchy markers into one regex, each as a named group.
+    """
+    combined_pattern_parts = []
+    for marker in markers:
+        # Append the pattern as a named group
+        combined_pattern_parts.append(f'(?P<{marker}>{HIERARCHY_MARKERS[marker].pattern})')
+    # Combine all parts using OR
+    return re.compile('|'.join(combined_pattern_parts), re.IGNORECASE | re.MULTILINE)
+
 def parse_hierarchy(content, hierarchy_mapping):
     """
     Parses the content into a hierarchical structure based on defined regex patterns and hierarchy mapping.
@@ -247,13 +260,8 @@ def parse_hierarchy(content, hierarchy_mapping):
     stack = []  # Stack to keep track of hierarchy levels
     last_pos = 0
 
-    # Create a combined regex pattern based on detected hierarchy markers
-    combined_pattern_parts = []
-    for marker in hierarchy_mapping:
-        # Append the pattern as a named group
-        combined_pattern_parts.append(f'(?P<{marker}>{HIERARCHY_MARKERS[marker].pattern})')
-    # Combine all parts using OR
-    combined_pattern = re.compile('|'.join(combined_pattern_parts), re.IGNORECASE | re.MULTILINE)
+    # Combined regex pattern for the detected hierarchy markers, compiled once per marker set
+    combined_pattern = _combined_pattern(tuple(hierarchy_mapping))
 
     for match in combined_pattern.finditer(content):
         start, end = match.span()
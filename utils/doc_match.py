@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import re
 from typing import List, Tuple, Dict
@@ -7,6 +8,19 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Document types, and the patterns built from them, compiled once at import
+_DOC_TYPES = r"Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định"
+# Full mention, e.g. "Nghị định 92/2012/NĐ-CP"
+_MENTION_PATTERN = re.compile(rf"(?:{_DOC_TYPES}) \d{{1,3}}/\d{{4}}(?:/[\w\-]+)?", re.UNICODE)
+# Document type and number/year, e.g. ("Nghị định", "92/2012")
+_PARTIAL_PATTERN = re.compile(rf"({_DOC_TYPES})\s+(\d{{1,3}}/\d{{4}})", re.UNICODE)
+_ID_PATTERN = re.compile(r"\d{1,3}/\d{4}(?:/[A-Za-z\-]+)?")
+_YEAR_PATTERN = re.compile(r"/(\d{4})")
+# Every mention starts with one of these, so text without any of them has no mentions
+_DOC_TYPE_KEYWORDS = ("Luật", "Bộ luật", "Pháp lệnh", "Nghị định", "Thông tư", "Nghị quyết", "Quyết định")
+_FIRST_CATEGORY_KEYWORDS = frozenset({"Luật", "Bộ luật", "Pháp lệnh"})
+_SECOND_CATEGORY_KEYWORDS = frozenset({"Nghị định", "Thông tư", "Nghị quyết", "Quyết định"})
+
 class DocumentMatcher:
     def __init__(self, csv_path: str):
         """
@@ -20,16 +34,22 @@ class DocumentMatcher:
             # Separate documents by type for Luật, Bộ luật, Pháp lệnh
             self.luat_documents = [doc for doc in self.documents if doc['Full Name'].startswith(('Luật', 'Bộ luật', 'Pháp lệnh'))]
             logger.debug(f"Loaded {len(self.luat_documents)} Luật/Bộ luật/Pháp lệnh documents.")
-            # Create a mapping for issuers from Thông tư documents
-            
+            # Columns used for scoring, normalized once so every mention is scored in one pass
+            self._titles_lower = pd.Series([str(doc['Full Name']).lower() for doc in self.documents], dtype=object)
+            self._issue_years = np.array([str(doc.get('issue_year')) for doc in self.documents], dtype=object)
+            self.preprocess_database()
         except Exception as e:
             logger.error(f"Cannot load document database with error: {e}")
             raise
     def preprocess_database(self):
         """
         Preprocess the document database to facilitate partial matching.
+        Builds the (Document Type, Year) -> full names mapping and an issue year -> row positions index.
         """
         self.partial_mapping = {}
+        self._year_index = {}
+        for position, year in enumerate(self._issue_years):
+            self._year_index.setdefault(year, []).append(position)
         # Define abbreviations for document types
         self.abbreviations = {
             "Nghị định": "NĐ",
@@ -43,17 +63,12 @@ class DocumentMatcher:
         # Create a mapping from (Document Type, Year) to full mentions
         for doc in self.documents:
             full_name = doc['Full Name']
-            doc_id = doc['Document_ID']
-            issued_date = doc['Issued Date']
             # Extract document type and year from full_name
-            match = re.match(r"(Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định)\s+(\d{1,3}/\d{4})", full_name, re.UNICODE)
+            match = _PARTIAL_PATTERN.match(full_name)
             if match:
                 doc_type = match.group(1)
                 doc_year = match.group(2).split('/')[1]  # Extract year part
-                key = (doc_type, doc_year)
-                if key not in self.partial_mapping:
-                    self.partial_mapping[key] = []
-                self.partial_mapping[key].append(full_name)
+                self.partial_mapping.setdefault((doc_type, doc_year), []).append(full_name)
         logger.debug(f"Preprocessed partial mapping: {self.partial_mapping}")
 
 
@@ -80,80 +95,56 @@ class DocumentMatcher:
         :param text: The text content to search for document mentions.
         :return: List of extracted document mentions.
         """
-        mentions = set()
+        if not any(keyword in text for keyword in _DOC_TYPE_KEYWORDS):
+            logger.debug("No document type keywords in text; skipping mention extraction.")
+            return []
 
-        # Define the document types
-        first_category_keywords = {"Luật", "Bộ luật", "Pháp lệnh"}
-        second_category_keywords = {"Nghị định", "Thông tư", "Nghị quyết", "Quyết định"}
+        mentions = set()
 
         # 1. Use regex to find all mentions
-        # Adjusted regex to capture the entire mention including the ID
         # The pattern matches the document type followed by a space and then the ID
         # IDs can have slashes and hyphens, like 77/2012/TT-BTC or 92/2012/NĐ-CP
-        # Use non-capturing group for the document type
-        pattern = r"(?:Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định) \d{1,3}/\d{4}(?:/[\w\-]+)?"
-        regex_matches = re.finditer(pattern, text, re.UNICODE)
-
-
-        for match in regex_matches:
+        for match in _MENTION_PATTERN.finditer(text):
             full_mention = match.group(0)
             mentions.add(full_mention)
             logger.info(f"Regex found mention: {full_mention}")
 
         # 2. Split the text into words for further extraction
         words = text.split()
-        logger.debug(f"Text split into words: {words}")
 
         # Iterate through words to find mentions based on keyword categories
         for i, word in enumerate(words):
-            # Check for first category keywords
-            if word in first_category_keywords:
-                # Capture up to 5 words after the keyword
-                following_words = words[i+1:i+6]  # 5 words after the keyword
-                mention_text = " ".join(following_words)
-                logger.debug(f"First category keyword '{word}' found. Following words: {following_words}")
-                # Look for parts with '/' or '-' to indicate IDs
-                id_pattern = r"\d{1,3}/\d{4}(?:/[A-Za-z\-]+)?"
-                id_match = re.search(id_pattern, mention_text)
-                if id_match:
-                    extracted_id = id_match.group(0)
-                    full_mention = f"{word} {extracted_id}"
-                    mentions.add(full_mention)
-                    logger.info(f"Extracted mention from first category: {full_mention}")
-
-            # Check for second category keywords
-            elif word in second_category_keywords:
-                # Capture up to 4 words after the keyword
-                following_words = words[i+1:i+5]  # 4 words after the keyword
-                mention_text = " ".join(following_words)
-                logger.debug(f"Second category keyword '{word}' found. Following words: {following_words}")
-                # Look for parts with '/' or '-' to indicate IDs
-                id_pattern = r"\d{1,3}/\d{4}(?:/[A-Za-z\-]+)?"
-                id_match = re.search(id_pattern, mention_text)
-                if id_match:
-                    extracted_id = id_match.group(0)
-                    full_mention = f"{word} {extracted_id}"
-                    mentions.add(full_mention)
-                    logger.info(f"Extracted mention from second category: {full_mention}")
-
-        
-            # 3. Handle partial mentions if no full mentions are found
-            if not mentions:
-                logger.debug("No full mentions found. Attempting to extract partial mentions.")
-                partial_pattern = r"(Luật|Bộ luật|Pháp lệnh|Nghị định|Thông tư(?: liên tịch)?|Nghị quyết|Quyết định)\s+\d{1,3}/\d{4}"
-                partial_matches = re.finditer(partial_pattern, text, re.UNICODE)
-                for match in partial_matches:
-                    doc_type = match.group(1)
-                    partial_id = match.group(2)  # e.g., "92/2012"
-                    key = (doc_type, partial_id.split('/')[1])  # (Document Type, Year)
-                    logger.debug(f"Partial mention found: {match.group(0)}. Looking up in partial mapping with key: {key}")
-                    if key in self.partial_mapping:
-                        # If multiple full mentions match, add all
-                        for full_name in self.partial_mapping[key]:
-                            mentions.add(full_name)
-                            logger.debug(f"Reconstructed full mention from partial: {full_name}")
-                    else:
-                        logger.debug(f"No matching full mention found for partial key: {key}")
+            # First category keywords take up to 5 following words, second category up to 4
+            if word in _FIRST_CATEGORY_KEYWORDS:
+                following_words = words[i+1:i+6]
+            elif word in _SECOND_CATEGORY_KEYWORDS:
+                following_words = words[i+1:i+5]
+            else:
+                continue
+            mention_text = " ".join(following_words)
+            logger.debug(f"Keyword '{word}' found. Following words: {following_words}")
+            # Look for parts with '/' or '-' to indicate IDs
+            id_match = _ID_PATTERN.search(mention_text)
+            if id_match:
+                full_mention = f"{word} {id_match.group(0)}"
+                mentions.add(full_mention)
+                logger.info(f"Extracted mention from keyword: {full_mention}")
+
+        # 3. Handle partial mentions if no full mentions are found
+        if not mentions:
+            logger.debug("No full mentions found. Attempting to extract partial mentions.")
+            for match in _PARTIAL_PATTERN.finditer(text):
+                doc_type = match.group(1)
+                partial_id = match.group(2)  # e.g., "92/2012"
+                key = (doc_type, partial_id.split('/')[1])  # (Document Type, Year)
+                logger.debug(f"Partial mention found: {match.group(0)}. Looking up in partial mapping with key: {key}")
+                if key in self.partial_mapping:
+                    # If multiple full mentions match, add all
+                    for full_name in self.partial_mapping[key]:
+                        mentions.add(full_name)
+                        logger.debug(f"Reconstructed full mention from partial: {full_name}")
+                else:
+                    logger.debug(f"No matching full mention found for partial key: {key}")
 
         unique_mentions = list(mentions)
         logger.info(f"Unique document mentions after processing: {unique_mentions}")
@@ -166,8 +157,7 @@ class DocumentMatcher:
         :param mention: The document mention string.
         :return: The extracted year as a string, or None if not found.
         """
-        year_pattern = r"/(\d{4})"
-        match = re.search(year_pattern, mention)
+        match = _YEAR_PATTERN.search(mention)
         year = match.group(1) if match else None
         logger.debug(f"Extracted year '{year}' from mention '{mention}'.")
         return year
@@ -213,14 +203,20 @@ class DocumentMatcher:
 
         for mention in mentions:
             issue_year = self.extract_issue_year_from_mention(mention)
-            for doc in self.documents:
-                score = self.calculate_matching_score(doc, mention, issue_year)
-                logger.debug(f"Score for document '{doc['Document_ID']}': {score}")
-                if score > best_score:
-                    best_score = score
-                    best_doc_id = doc['Document_ID']  
-                    best_file_name = doc['Filename']   
-                    logger.debug(f"New best match: ID = {best_doc_id}, Name = {best_file_name}, Score = {best_score:.2f}")
+            if not self.documents:
+                break
+            # Same weights as calculate_matching_score, applied to every document at once
+            title_match = self._titles_lower.str.contains(mention.lower(), regex=False).to_numpy(dtype=bool)
+            scores = np.where(title_match, 0.7, 0.0)
+            year_rows = self._year_index.get(issue_year) if issue_year else None
+            if year_rows:
+                scores[year_rows] += 0.3
+            best_idx = int(np.argmax(scores))
+            if scores[best_idx] > best_score:
+                best_score = float(scores[best_idx])
+                best_doc_id = self.documents[best_idx]['Document_ID']
+                best_file_name = self.documents[best_idx]['Filename']
+                logger.debug(f"New best match: ID = {best_doc_id}, Name = {best_file_name}, Score = {best_score:.2f}")
 
         logger.info(f"Best matching document: ID = {best_doc_id}, Name = {best_file_name}, Score = {best_score:.2f}")
         return best_doc_id, best_file_name, best_score
@@ -3,6 +3,7 @@
 import pandas as pd
 import logging
 import json
+import re
 from typing import List, Dict, Any, Optional
 from utils.validation import validate_record
 from utils.file_handler import read_file_content
@@ -13,6 +14,9 @@ from utils.record import Record
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Article headings that separate chunks, e.g. "Article 12. "
+_ARTICLE_SPLIT_RE = re.compile(r'Article\s+\d+[\.,]?\s+')
+
 class EnrichmentProcessor:
     def __init__(self, config: Dict[str, Any], documents_df: pd.DataFrame, prompts_path: str = "config/schemas/prompts.yaml"):
         """
@@ -54,9 +58,7 @@ class EnrichmentProcessor:
             A list of text chunks.
         """
         # Example: Split by articles using regex
-        import re
-        pattern = r'Article\s+\d+[\.,]?\s+'
-        chunks = re.split(pattern, content)
+        chunks = _ARTICLE_SPLIT_RE.split(content)
         # Remove empty strings and strip whitespace
         chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
         return chunks
@@ -1,10 +1,11 @@
 # utils/file_handler.py
 
 import yaml
-import json
+import orjson
 import logging
-from typing import List, Dict, Any, Optional, Union
-import re
+import mmap
+import threading
+from typing import List, Dict, Any, Optional, Union, Iterator, Set, Tuple
 import os
 import pandas as pd
 import tempfile
@@ -20,6 +21,18 @@ from utils.record import Record
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Write buffer for output files, so records are flushed in large batches
+_OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Record IDs of each JSONL output file, keyed by path. An entry is trusted only while the
+# file's (size, mtime) still matches, so edits made outside output_2_jsonl force a rescan.
+_JSONL_ID_INDEX: Dict[str, Tuple[Tuple[int, int], Set[str]]] = {}
+_JSONL_LOCK = threading.Lock()
+
+# Delimiters of one complete <id=...>...</id=...> block in the raw input bytes
+_OPEN_TAG = b'<id='
+_CLOSE_TAG = b'</id='
+
 def load_record(raw_input: str, llm_processor, is_formatted: bool = True) -> Optional[Record]:
     """
     Load a Record object from raw input, determining the format.
@@ -30,21 +43,26 @@ def load_record(raw_input: str, llm_processor, is_formatted: bool = True) -> Opt
     :return: Record object or None if loading fails.
     """
     try:
+        stripped = raw_input.lstrip()
+        if not stripped:
+            logging.debug("Input is blank; no record to load.")
+            return None
         if is_formatted:
-            # Attempt to parse as JSON
-            try:
-                record = Record.from_json(raw_input)
+            # Dispatch on the first non-whitespace character instead of trying each parser in turn
+            if stripped[0] == '{':
+                try:
+                    record = Record.from_json(orjson.loads(stripped))
+                    if record:
+                        logging.debug("Record loaded from JSON.")
+                        return record
+                except orjson.JSONDecodeError as e:
+                    logging.debug(f"Failed to load record from JSON: {e}")
+            elif stripped[0] == '<':
+                # Attempt to parse as tagged text
+                record = Record.from_tagged_text(raw_input)
                 if record:
-                    logging.debug("Record loaded from JSON.")
+                    logging.debug("Record loaded from tagged text.")
                     return record
-            except Exception as e:
-                logging.debug(f"Failed to load record from JSON: {e}")
-
-            # Attempt to parse as tagged text
-            record = Record.from_tagged_text(raw_input)
-            if record:
-                logging.debug("Record loaded from tagged text.")
-                return record
 
             # If parsing fails, treat as unformatted
             logging.debug("Record could not be parsed as formatted. Treating as unformatted.")
@@ -67,6 +85,67 @@ def load_record(raw_input: str, llm_processor, is_formatted: bool = True) -> Opt
         logging.error(f"Unexpected error in load_record: {e}")
         return None
 
+def _tagged_record_spans(buf) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the (start, end) offsets of each <id=...>...</id=...> block in buf, the same
+    spans as re.finditer(rb'<id=[^>]+>.*?</id=[^>]+>', buf, re.DOTALL).
+
+    Each tag is located with find(), which runs in C and never backtracks, so the scan
+    stays linear even when a record is never closed; the lazy regex would instead scan
+    to the end of the input once for every unclosed opening tag.
+
+    :param buf: A bytes-like object supporting find(), such as an mmap.
+    :return: Iterator over (start, end) offsets.
+    """
+    pos = 0
+    while True:
+        start = buf.find(_OPEN_TAG, pos)
+        if start == -1:
+            return
+        open_end = buf.find(b'>', start + len(_OPEN_TAG))
+        if open_end == -1:
+            return
+        if open_end == start + len(_OPEN_TAG):
+            # Empty id, not an opening tag
+            pos = start + 1
+            continue
+        search_from = open_end + 1
+        while True:
+            close = buf.find(_CLOSE_TAG, search_from)
+            if close == -1:
+                # No closing tag after this one, so none after any later opening tag either
+                return
+            close_end = buf.find(b'>', close + len(_CLOSE_TAG))
+            if close_end == -1:
+                return
+            if close_end > close + len(_CLOSE_TAG):
+                break
+            search_from = close + 1
+        yield start, close_end + 1
+        pos = close_end + 1
+
+def iter_records(file_path: str) -> Iterator[str]:
+    """
+    Stream tagged records from the input file one at a time.
+
+    The file is memory-mapped and scanned in place, so the raw bytes are never
+    copied into a Python buffer; only each matched record is decoded.
+
+    :param file_path: Path to the input file.
+    :return: Iterator over the raw record strings.
+    """
+    try:
+        # mmap cannot map an empty file
+        if os.path.getsize(file_path) == 0:
+            return
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start, end in _tagged_record_spans(mm):
+                yield mm[start:end].decode('utf-8')
+        logging.info(f"Streamed records from '{file_path}'.")
+    except Exception as e:
+        logging.error(f"Error streaming records from '{file_path}': {e}")
+        raise
+
 def read_input_file(file_path):
     """
     Read the raw input file and return its content.
@@ -87,8 +166,8 @@ def write_output_file(file_path, data):
     Write the processed data to the output file in JSON format.
     """
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         logging.info(f"Wrote processed data to '{file_path}'.")
     except Exception as e:
         logging.error(f"Error writing to output file '{file_path}': {e}")
@@ -314,12 +393,91 @@ def generate_unique_id(prefix: str = "REC") -> str:
 
 
 
+def _jsonl_record_ids(file_path: str) -> Tuple[Set[str], bool]:
+    """
+    Return the record IDs stored in a JSONL output file, from the index when it is current.
+
+    :param file_path: Path to the output file.
+    :return: The set of IDs, and whether the file lacks a trailing newline.
+    """
+    stat = os.stat(file_path)
+    cached = _JSONL_ID_INDEX.get(file_path)
+    if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+        # The file was last written by output_2_jsonl, which always ends with a newline
+        return cached[1], False
+
+    logger.debug(f"Output file '{file_path}' exists. Reading existing record IDs.")
+    ids = set()
+    line = b''
+    with open(file_path, 'rb') as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            try:
+                record = orjson.loads(stripped)
+            except orjson.JSONDecodeError as e:
+                logger.error(f"JSON decoding error while reading '{file_path}': {e}")
+                continue
+            record_id = record.get('record_id') or record.get('id') if isinstance(record, dict) else None
+            if record_id:
+                ids.add(record_id)
+    return ids, bool(line) and not line.endswith(b'\n')
+
+def _rewrite_jsonl(file_path: str, new_records: Dict[str, Dict[str, Any]]) -> Set[str]:
+    """
+    Rewrite a JSONL output file, replacing records whose IDs appear in new_records
+    and appending the rest.
+
+    :param file_path: Path to the output file.
+    :param new_records: Records to write, keyed by ID.
+    :return: The set of IDs in the rewritten file.
+    """
+    existing_records_dict = {}
+    with open(file_path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = orjson.loads(line)
+                # Use 'record_id' as the primary identifier, fallback to 'id' if necessary
+                record_id = record.get('record_id') or record.get('id')
+                if record_id:
+                    existing_records_dict[record_id] = record
+                else:
+                    logger.warning("Existing record does not contain 'record_id' or 'id'. Skipping.")
+            except orjson.JSONDecodeError as e:
+                logger.error(f"JSON decoding error while reading '{file_path}': {e}")
+                continue
+
+    for record_id, record in new_records.items():
+        if record_id in existing_records_dict:
+            logger.debug(f"Overwriting existing record with ID: {record_id}.")
+        else:
+            logger.debug(f"Appending new record with ID: {record_id}.")
+        existing_records_dict[record_id] = record
+
+    # Write all records back to the file in JSONL format.
+    # orjson emits UTF-8 bytes directly; a large buffer batches the syscalls.
+    with open(file_path, 'wb', buffering=_OUTPUT_BUFFER_SIZE) as f:
+        f.writelines(
+            orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)  # Newline separator between records
+            for rec in existing_records_dict.values()
+        )
+
+    logger.debug(f"Successfully saved {len(existing_records_dict)} record(s) to '{file_path}'.")
+    return set(existing_records_dict)
+
 def output_2_jsonl(file_path: str, records: Union[Dict[str, Any], List[Union[Dict[str, Any], Any]]]):
     """
     Append processed record(s) to the output file in JSONL format.
     If a record with the same 'record_id' or 'id' exists, overwrite it.
     If the file does not exist, create it.
 
+    New records are appended without reading the file back; the IDs already in each file
+    are kept in memory, and the whole file is only rewritten when a record is overwritten.
+
     Records are stored as JSON objects, one per line.
 
     :param file_path: Path to the output file.
@@ -344,32 +502,8 @@ def output_2_jsonl(file_path: str, records: Union[Dict[str, Any], List[Union[Dic
             logger.error("The 'records' parameter must be a dictionary, a Record instance with 'to_dict', or a list of them.")
             return
 
-        # Initialize a dictionary to hold existing records for quick lookup
-        existing_records_dict = {}
-
-        # Check if the output file exists and load existing records
-        if os.path.exists(file_path):
-            logger.debug(f"Output file '{file_path}' exists. Reading existing records.")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        record = json.loads(line)
-                        # Use 'record_id' as the primary identifier, fallback to 'id' if necessary
-                        record_id = record.get('record_id') or record.get('id')
-                        if record_id:
-                            existing_records_dict[record_id] = record
-                        else:
-                            logger.warning("Existing record does not contain 'record_id' or 'id'. Skipping.")
-                    except json.JSONDecodeError as e:
-                        logger.error(f"JSON decoding error while reading '{file_path}': {e}")
-                        continue
-        else:
-            logger.info(f"Output file '{file_path}' does not exist. It will be created.")
-
-        # Process each new record
+        # Later records with the same ID replace earlier ones
+        new_records = {}
         for record in records_to_add:
             if not isinstance(record, dict):
                 logger.warning("Skipping non-dictionary record.")
@@ -380,22 +514,31 @@ def output_2_jsonl(file_path: str, records: Union[Dict[str, Any], List[Union[Dic
             if not record_id:
                 logger.error("Record does not contain a 'record_id' or 'id' field. Skipping.")
                 continue
+            new_records[record_id] = record
 
-            if record_id in existing_records_dict:
-                logger.info(f"Overwriting existing record with ID: {record_id}.")
+        with _JSONL_LOCK:
+            if not os.path.exists(file_path):
+                logger.info(f"Output file '{file_path}' does not exist. It will be created.")
+                existing_ids, needs_newline = set(), False
             else:
-                logger.info(f"Appending new record with ID: {record_id}.")
-
-            # Update or add the record in the existing_records_dict
-            existing_records_dict[record_id] = record
-
-        # Write all records back to the file in JSONL format
-        with open(file_path, 'w', encoding='utf-8') as f:
-            for rec_id, rec in existing_records_dict.items():
-                json.dump(rec, f, ensure_ascii=False)
-                f.write('\n')  # Newline separator between records
+                existing_ids, needs_newline = _jsonl_record_ids(file_path)
+
+            if existing_ids.isdisjoint(new_records):
+                # Only new IDs: append them instead of rewriting the whole file
+                with open(file_path, 'ab', buffering=_OUTPUT_BUFFER_SIZE) as f:
+                    if needs_newline:
+                        f.write(b'\n')
+                    f.writelines(
+                        orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)  # Newline separator between records
+                        for rec in new_records.values()
+                    )
+                existing_ids.update(new_records)
+                logger.debug(f"Appended {len(new_records)} record(s) to '{file_path}'.")
+            else:
+                existing_ids = _rewrite_jsonl(file_path, new_records)
 
-        logger.debug(f"Successfully saved {len(existing_records_dict)} record(s) to '{file_path}'.")
+            stat = os.stat(file_path)
+            _JSONL_ID_INDEX[file_path] = ((stat.st_size, stat.st_mtime_ns), existing_ids)
 
     except Exception as e:
         logger.error(f"An error occurred in output_to_jsonl: {e}")
\ No newline at end of file
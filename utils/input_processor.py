@@ -1,10 +1,16 @@
 # input_processor.py
 
 import logging
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Union, Dict, Any, Iterable, Iterator, Callable
 import os
-import json
 import re
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from tqdm import tqdm
+
+import orjson
 
 import pandas as pd
 from PyPDF2 import PdfReader
@@ -14,11 +20,120 @@ from lxml import etree
 from tasks.preprocessing import Preprocessor  
 from utils.record import Record  
 from utils.llm_formatter import LLMFormatter, detect_text_type  
+from utils.rate_limiter import TokenBucket
+from utils.file_handler import iter_records
 
 # Configure logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Regex to find all <id=...>...</id=...> blocks
+_TAGGED_BLOCK_RE = re.compile(r'(<id=.+?>)(.*?)</id=.+?>', re.DOTALL)
+_ID_TAG_RE = re.compile(r'<id=(.+?)>')
+
+
+def _iter_paragraphs(text: str) -> Iterable[str]:
+    """
+    Yield the same pieces as text.split('\\n\\n'), one at a time instead of as a list.
+    """
+    start = 0
+    while True:
+        end = text.find('\n\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 2
+
+
+def _bounded_map(executor: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Like executor.map, but keep at most `window` tasks submitted ahead of the consumer.
+    Executor.map submits every item up front, which drains a streaming input into memory
+    before the first result is read; this pulls items only as results are consumed.
+
+    :param executor: The executor to run fn on.
+    :param fn: Function applied to each item.
+    :param items: The (possibly lazy) input items.
+    :param window: Maximum number of submitted but not yet yielded tasks.
+    :return: Iterator over the results, in input order.
+    """
+    items = iter(items)
+    futures = deque(executor.submit(fn, item) for item in islice(items, window))
+    try:
+        while futures:
+            result = futures.popleft().result()
+            for item in islice(items, 1):
+                futures.append(executor.submit(fn, item))
+            yield result
+    finally:
+        # Like executor.map, drop queued work if the consumer stops early
+        for future in futures:
+            future.cancel()
+
+
+def process_one(
+    record_str: str,
+    return_type: str,
+    record_type: str,
+    llm_formatter: Optional[LLMFormatter],
+    rate_limiter: Optional[TokenBucket]
+) -> Optional[Union[Record, Dict[str, Any], str]]:
+    """
+    Run the whole per-record pipeline (rate limiting, LLM formatting and parsing) for one record.
+
+    :param record_str: The raw record string.
+    :param return_type: The desired return type ('record', 'dict', 'json').
+    :param record_type: Type of the record ('QA' or 'DOC').
+    :param llm_formatter: LLMFormatter used for unformatted text, or None for structured input.
+    :param rate_limiter: Token bucket drawn from before each LLM call, or None.
+    :return: The parsed record, or None if parsing fails.
+    """
+    if llm_formatter is not None and rate_limiter is not None:
+        rate_limiter.acquire()
+    return Record.parse_record(
+        record_str=record_str,
+        return_type=return_type,
+        record_type=record_type,
+        llm_formatter=llm_formatter
+    )
+
+def process_chunk(
+    record_strs: List[str],
+    return_type: str,
+    record_type: str,
+    llm_formatter: LLMFormatter,
+    rate_limiter: Optional[TokenBucket]
+) -> List[Optional[Union[Record, Dict[str, Any], str]]]:
+    """
+    Run the per-record pipeline for a chunk of records, converting all of its
+    unformatted records to tagged format with one LLM call.
+
+    :param record_strs: The raw record strings in the chunk.
+    :param return_type: The desired return type ('record', 'dict', 'json').
+    :param record_type: Type of the record ('QA' or 'DOC').
+    :param llm_formatter: LLMFormatter used for unformatted text.
+    :param rate_limiter: Token bucket drawn from before each LLM call, or None.
+    :return: The parsed record (or None) for each input, in order.
+    """
+    record_strs = list(record_strs)
+    pending = {i for i, record_str in enumerate(record_strs) if detect_text_type(record_str) == "unformatted"}
+    if len(pending) > 1:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        indices = sorted(pending)
+        formatted = llm_formatter.format_batch([record_strs[i] for i in indices])
+        for i, tagged_text in zip(indices, formatted):
+            if tagged_text:
+                record_strs[i] = tagged_text
+                pending.discard(i)
+
+    # Records the batched call could not convert fall back to one LLM call each
+    return [
+        process_one(record_str, return_type, record_type, llm_formatter, rate_limiter if i in pending else None)
+        for i, record_str in enumerate(record_strs)
+    ]
+
 class InputProcessor:
     """
     A class to handle the processing of input files containing records in various formats.
@@ -32,6 +147,20 @@ class InputProcessor:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.preprocessor = self._initialize_preprocessor()
+        processing_config = self.config.get('processing', {})
+        self.concurrency = processing_config.get('concurrency', 16)
+        # Draw from the provider's per-API-key bucket when it sets 'rpm', so that limit holds
+        # across every caller; otherwise fall back to a bucket for this processor alone
+        provider_bucket = getattr(self.preprocessor.llm_formatter.provider, 'rate_limiter', None)
+        if provider_bucket is not None:
+            self.rate_limiter = provider_bucket
+        else:
+            requests_per_minute = processing_config.get('max_requests_per_minute', 60)
+            self.rate_limiter = TokenBucket(
+                capacity=requests_per_minute,
+                refill_rate=requests_per_minute / 60
+            )
+        self.batch_size = processing_config.get('batch_size', 1)
         logger.info("InputProcessor initialized with provided configuration.")
 
 
@@ -70,7 +199,18 @@ class InputProcessor:
         processed_records = []
 
         try:
-            if file_extension in self.SUPPORTED_TEXT_EXTENSIONS:
+            if file_extension == '.txt' and self._is_tagged_file(file_path):
+                # Stream tagged records instead of loading the whole file
+                logger.info("Processing content as 'tagged' text. Streaming records from file.")
+                processed_records.extend(self._parse_records(
+                    iter_records(file_path),
+                    return_type=return_type,
+                    record_type=record_type,
+                    llm_formatter=None,  # Tagged records don't need LLMFormatter
+                    label="tagged record"
+                ))
+
+            elif file_extension in self.SUPPORTED_TEXT_EXTENSIONS:
                 content = self._extract_text_file(file_path, file_extension)
                 text_type = detect_text_type(content)
                 logger.debug(f"Detected text type: {text_type}")
@@ -81,37 +221,28 @@ class InputProcessor:
                     tagged_records = self._extract_multiple_tagged_records(content)
                     logger.info(f"Found {len(tagged_records)} tagged record(s).")
 
-                    for idx, record_str in enumerate(tagged_records, start=1):
-                        logger.debug(f"Processing tagged record {idx}/{len(tagged_records)}.")
-                        record = Record.parse_record(
-                            record_str=record_str,
-                            return_type=return_type,
-                            record_type=record_type,
-                            llm_formatter=None  # Tagged records don't need LLMFormatter
-                        )
-                        if record:
-                            processed_records.append(record)
-                        else:
-                            logger.warning(f"Failed to parse tagged record {idx}.")
+                    processed_records.extend(self._parse_records(
+                        tagged_records,
+                        return_type=return_type,
+                        record_type=record_type,
+                        llm_formatter=None,  # Tagged records don't need LLMFormatter
+                        label="tagged record"
+                    ))
 
                 elif text_type == "json":
                     # Handle both single JSON objects and JSON arrays
                     logger.info("Processing content as 'json'.")
                     try:
-                        json_data = json.loads(content)
+                        json_data = orjson.loads(content)
                         if isinstance(json_data, list):
                             logger.info(f"Processing {len(json_data)} JSON record(s).")
-                            for idx, record_dict in enumerate(json_data, start=1):
-                                record = Record.parse_record(
-                                    record_str=json.dumps(record_dict),
-                                    return_type=return_type,
-                                    record_type=record_type,
-                                    llm_formatter=None  # Assuming JSON records are structured
-                                )
-                                if record:
-                                    processed_records.append(record)
-                                else:
-                                    logger.warning(f"Failed to parse JSON record {idx}.")
+                            processed_records.extend(self._parse_records(
+                                [orjson.dumps(record_dict).decode('utf-8') for record_dict in json_data],
+                                return_type=return_type,
+                                record_type=record_type,
+                                llm_formatter=None,  # Assuming JSON records are structured
+                                label="JSON record"
+                            ))
                         elif isinstance(json_data, dict):
                             logger.info("Processing single JSON record.")
                             record = Record.parse_record(
@@ -126,7 +257,7 @@ class InputProcessor:
                                 logger.warning("Failed to parse JSON record.")
                         else:
                             logger.error("Unsupported JSON structure.")
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.error(f"JSON decoding error: {e}")
 
                 elif text_type == "unformatted":
@@ -135,18 +266,13 @@ class InputProcessor:
                     chunks = self._chunk_text(content)
                     logger.info(f"Created {len(chunks)} chunk(s) from unformatted text.")
 
-                    for idx, chunk in enumerate(chunks, start=1):
-                        logger.debug(f"Processing chunk {idx}/{len(chunks)}.")
-                        record = Record.parse_record(
-                            record_str=chunk,
-                            return_type=return_type,
-                            record_type=record_type,
-                            llm_formatter=self.preprocessor.llm_formatter
-                        )
-                        if record:
-                            processed_records.append(record)
-                        else:
-                            logger.warning(f"Failed to parse chunk {idx} into a Record.")
+                    processed_records.extend(self._parse_records(
+                        chunks,
+                        return_type=return_type,
+                        record_type=record_type,
+                        llm_formatter=self.preprocessor.llm_formatter,
+                        label="chunk"
+                    ))
                 else:
                     logger.error(f"Unsupported text type detected: {text_type}")
 
@@ -154,18 +280,13 @@ class InputProcessor:
                 records = self._process_tabular_file(file_path)
                 logger.info(f"Processed {len(records)} record(s) from tabular file.")
 
-                for idx, record_dict in enumerate(records, start=1):
-                    logger.debug(f"Processing tabular record {idx}/{len(records)}.")
-                    record = Record.parse_record(
-                        record_str=json.dumps(record_dict),
-                        return_type=return_type,
-                        record_type=record_type,
-                        llm_formatter=None  # Assuming tabular data is already structured
-                    )
-                    if record:
-                        processed_records.append(record)
-                    else:
-                        logger.warning(f"Failed to parse tabular record {idx} with ID: {record_dict.get('record_id') or record_dict.get('id')}.")
+                processed_records.extend(self._parse_records(
+                    [orjson.dumps(record_dict).decode('utf-8') for record_dict in records],
+                    return_type=return_type,
+                    record_type=record_type,
+                    llm_formatter=None,  # Assuming tabular data is already structured
+                    label="tabular record"
+                ))
 
             elif file_extension in self.SUPPORTED_DOCUMENT_EXTENSIONS:
                 content = self._extract_document_file(file_path, file_extension)
@@ -178,18 +299,13 @@ class InputProcessor:
                     chunks = self._chunk_text(content)
                     logger.info(f"Created {len(chunks)} chunk(s) from document text.")
 
-                    for idx, chunk in enumerate(chunks, start=1):
-                        logger.debug(f"Processing chunk {idx}/{len(chunks)}.")
-                        record = Record.parse_record(
-                            record_str=chunk,
-                            return_type=return_type,
-                            record_type=record_type,
-                            llm_formatter=self.preprocessor.llm_formatter
-                        )
-                        if record:
-                            processed_records.append(record)
-                        else:
-                            logger.warning(f"Failed to parse chunk {idx} into a Record.")
+                    processed_records.extend(self._parse_records(
+                        chunks,
+                        return_type=return_type,
+                        record_type=record_type,
+                        llm_formatter=self.preprocessor.llm_formatter,
+                        label="chunk"
+                    ))
             else:
                 logger.error(f"Unsupported file extension: '{file_extension}'. Supported extensions are: "
                              f"{self.SUPPORTED_TEXT_EXTENSIONS + self.SUPPORTED_TABULAR_EXTENSIONS + self.SUPPORTED_DOCUMENT_EXTENSIONS}")
@@ -201,6 +317,77 @@ class InputProcessor:
         logger.info(f"Processing complete. Total records processed: {len(processed_records)}.")
         return processed_records
 
+    def _parse_records(
+        self,
+        record_strs: Iterable[str],
+        return_type: str,
+        record_type: str,
+        llm_formatter: Optional[LLMFormatter] = None,
+        label: str = "record"
+    ) -> List[Union[Record, Dict[str, Any], str]]:
+        """
+        Parse record strings concurrently, keeping the input order of the results.
+        Records that go through the LLM draw from the shared token bucket, and are
+        converted batch_size at a time when batching is enabled.
+
+        :param record_strs: The raw record strings to parse.
+        :param return_type: The desired return type for each record ('record', 'dict', 'json').
+        :param record_type: Type of the record ('QA' or 'DOC') to prefix the record_id accordingly.
+        :param llm_formatter: LLMFormatter used for unformatted text, or None for structured input.
+        :param label: Name of the record kind used in log messages.
+        :return: A list of successfully parsed records.
+        """
+        parse_one = partial(
+            process_one,
+            return_type=return_type,
+            record_type=record_type,
+            llm_formatter=llm_formatter,
+            rate_limiter=self.rate_limiter
+        )
+
+        parsed_records = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            if llm_formatter is not None and self.batch_size > 1:
+                # Send unformatted records to the LLM in chunks of batch_size
+                record_iter = iter(record_strs)
+                chunks = iter(lambda: list(islice(record_iter, self.batch_size)), [])
+                parse_chunk = partial(
+                    process_chunk,
+                    return_type=return_type,
+                    record_type=record_type,
+                    llm_formatter=llm_formatter,
+                    rate_limiter=self.rate_limiter
+                )
+                results = (
+                    record
+                    for chunk in _bounded_map(executor, parse_chunk, chunks, self.concurrency * 2)
+                    for record in chunk
+                )
+            else:
+                results = _bounded_map(executor, parse_one, record_strs, self.concurrency * 2)
+            for idx, record in enumerate(tqdm(results, desc="Processing", mininterval=0.5), start=1):
+                if record:
+                    parsed_records.append(record)
+                else:
+                    logger.warning(f"Failed to parse {label} {idx}.")
+        return parsed_records
+
+    def _is_tagged_file(self, file_path: str, sniff_size: int = 4096) -> bool:
+        """
+        Check whether a text file starts with a tagged record, without reading it all.
+
+        :param file_path: Path to the file.
+        :param sniff_size: Number of characters to inspect at the start of the file.
+        :return: True if the file begins with an <id=...> tag.
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                head = f.read(sniff_size)
+            return head.lstrip().startswith('<id=')
+        except Exception as e:
+            logger.debug(f"Could not sniff file '{file_path}': {e}")
+            return False
+
     def _extract_multiple_tagged_records(self, content: str) -> List[str]:
         """
         Extract multiple tagged records from the content based on <id=...> tags.
@@ -208,14 +395,12 @@ class InputProcessor:
         :param content: The raw text content containing multiple records.
         :return: A list of individual record strings.
         """
-        # Regex to find all <id=...>...</id=...> blocks
-        pattern = re.compile(r'(<id=.+?>)(.*?)</id=.+?>', re.DOTALL)
-        matches = pattern.findall(content)
+        matches = _TAGGED_BLOCK_RE.findall(content)
 
         records = []
         for match in matches:
             start_tag, record_content = match
-            end_tag = re.sub(r'<id=(.+?)>', r'</id=\1>', start_tag)
+            end_tag = _ID_TAG_RE.sub(r'</id=\1>', start_tag)
             full_record = f"{start_tag}{record_content}{end_tag}"
             records.append(full_record.strip())
 
@@ -307,23 +492,28 @@ class InputProcessor:
         :param max_words: Maximum number of words per chunk.
         :return: A list of text chunks.
         """
-        paragraphs = text.split('\n\n')  # Split by double newlines to get paragraphs
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the chunk being built and their total word count, kept as running
+        # values so the chunk is never re-split or re-concatenated as it grows
+        current_chunk = []
+        current_words = 0
 
-        for paragraph in paragraphs:
+        # Split by double newlines to get paragraphs, lazily so only one paragraph is held at a time
+        for paragraph in _iter_paragraphs(text):
             word_count = len(paragraph.split())
             if word_count == 0:
                 continue  # Skip empty paragraphs
 
-            if len(current_chunk.split()) + word_count <= max_words:
-                current_chunk += f"\n\n{paragraph}" if current_chunk else paragraph
+            if current_words + word_count <= max_words:
+                current_chunk.append(paragraph)
+                current_words += word_count
             else:
                 if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = paragraph  # Start a new chunk
+                    chunks.append("\n\n".join(current_chunk).strip())
+                current_chunk = [paragraph]  # Start a new chunk
+                current_words = word_count
 
         if current_chunk:
-            chunks.append(current_chunk.strip())
+            chunks.append("\n\n".join(current_chunk).strip())
 
         return chunks
@@ -2,13 +2,13 @@
 
 import logging
 import json
+import re
 import yaml
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from providers import ProviderFactory  
-from providers.openai_provider import OpenAIProvider
-from providers.groq_provider import GroqProvider
 from providers.api_provider import APIProvider
 from utils.validation import detect_text_type, is_english
+from utils.load_config import SafeLoader
 # from utils.record import Record
 # logging.getLogger(__name__)
 
@@ -16,6 +16,9 @@ from utils.validation import detect_text_type, is_english
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One record of a batched reply, keyed by the number of its input text
+_BATCH_RECORD_RE = re.compile(r'<id=(\d+)>.*?</id=\1>', re.DOTALL)
+
 class LLMFormatter:
     """
     Unified LLM Formatter supporting multiple formatting and enrichment modes and providers.
@@ -31,6 +34,14 @@ class LLMFormatter:
         if not hasattr(self, 'initialized'):  # Avoid re-initializing
             self.config = config
             self.prompts = self._load_prompts(prompts_path)
+            # Prompt templates are looked up once instead of on every record
+            formatting_prompts = self.prompts.get('formatting', {})
+            self.tagged_prompt = formatting_prompts.get('tagged', {}).get('prompt')
+            self.tagged_batch_prompt = formatting_prompts.get('tagged_batch', {}).get('prompt')
+            self.json_prompt = formatting_prompts.get('json', {}).get('prompt')
+            self.enrichment_prompt = self.prompts.get('enrichment', {}).get('enrichment_prompt')
+            # Last JSON schema serialized for the json prompt, and its compact text
+            self._schema_cache = (None, None)
             self.provider_name = self.config.get('provider', 'openai').lower()
             self.provider = self._initialize_provider()
             self.initialized = True  # Mark as initialized
@@ -45,7 +56,7 @@ class LLMFormatter:
         """
         try:
             with open(prompts_path, 'r', encoding='utf-8') as file:
-                prompts = yaml.safe_load(file)
+                prompts = yaml.load(file, Loader=SafeLoader)
             logger.info(f"Loaded prompts from '{prompts_path}'.")
             return prompts.get('prompts', {})
         except FileNotFoundError:
@@ -58,6 +69,20 @@ class LLMFormatter:
             logger.error(f"Unexpected error loading prompts '{prompts_path}': {e}")
             raise
 
+    def _serialize_schema(self, json_schema: Dict[str, Any]) -> str:
+        """
+        Serialize a JSON schema compactly for the json prompt.
+        Callers pass the same schema object for every record, so the last result is reused.
+
+        :param json_schema: The JSON schema dictionary.
+        :return: The schema as compact JSON text.
+        """
+        cached_schema, cached_str = self._schema_cache
+        if cached_schema is not json_schema:
+            cached_str = json.dumps(json_schema, ensure_ascii=False, separators=(',', ':'))
+            self._schema_cache = (json_schema, cached_str)
+        return cached_str
+
     def _initialize_provider(self) -> APIProvider:
         """
         Initialize the API provider based on the configuration.
@@ -110,9 +135,9 @@ class LLMFormatter:
                 if mode != "tagged":
                     logger.error("Unformatted input can only be converted to 'tagged' mode.")
                     return None
-                logger.info("Converting unformatted text to tagged format using LLMFormatter.")
+                logger.debug("Converting unformatted text to tagged format using LLMFormatter.")
                 # Retrieve the tagged prompt template
-                prompt_template = self.prompts.get('formatting', {}).get('tagged', {}).get('prompt')
+                prompt_template = self.tagged_prompt
                 if not prompt_template:
                     logger.error("Tagged prompt template not found in prompts.yaml.")
                     return None
@@ -130,11 +155,11 @@ class LLMFormatter:
             # Handle based on desired mode
             if mode == "tagged":
                 if text_type == "tagged":
-                    logger.info("Input is already in tagged format. Returning as-is.")
+                    logger.debug("Input is already in tagged format. Returning as-is.")
                     return raw_text
                 elif text_type == "json":
-                    logger.info("Converting JSON to tagged format.")
-                    prompt_template = self.prompts.get('formatting', {}).get('tagged', {}).get('prompt')
+                    logger.debug("Converting JSON to tagged format.")
+                    prompt_template = self.tagged_prompt
                     if not prompt_template:
                         logger.error("Tagged prompt template not found in prompts.yaml.")
                         return None
@@ -147,28 +172,29 @@ class LLMFormatter:
 
             elif mode == "json":
                 if text_type == "json":
-                    logger.info("Input is already in JSON format. Returning as-is.")
+                    logger.debug("Input is already in JSON format. Returning as-is.")
                     return raw_text
                 elif text_type == "tagged":
-                    logger.info("Converting tagged format to JSON.")
-                    prompt_template = self.prompts.get('formatting', {}).get('json', {}).get('prompt')
+                    logger.debug("Converting tagged format to JSON.")
+                    prompt_template = self.json_prompt
                     if not prompt_template:
                         logger.error("JSON prompt template not found in prompts.yaml.")
                         return None
                     if not json_schema:
                         logger.error("json_schema must be provided for json formatting mode.")
                         return None
-                    json_schema_str = json.dumps(json_schema, indent=2)
+                    json_schema_str = self._serialize_schema(json_schema)
                     prompt = prompt_template.format(raw_text=raw_text, json_schema=json_schema_str)
-                    formatted_output = self.provider.send_message(prompt=prompt)
+                    # Native JSON mode returns a bare object, with no fences or prose to strip
+                    formatted_output = self.provider.send_message(prompt=prompt, json_mode=True)
                     if not formatted_output:
                         logger.error("LLMFormatter failed to convert tagged format to JSON.")
                         return None
                     return formatted_output
 
             elif mode == "enrichment":
-                logger.info("Performing enrichment on the input text.")
-                prompt_template = self.prompts.get('enrichment', {}).get('enrichment_prompt')
+                logger.debug("Performing enrichment on the input text.")
+                prompt_template = self.enrichment_prompt
                 if not prompt_template:
                     logger.error("Enrichment prompt template not found in prompts.yaml.")
                     return None
@@ -190,7 +216,39 @@ class LLMFormatter:
             logger.error(f"Error in format_text method: {e}")
             return None
 
-    
+    def format_batch(self, raw_texts: List[str]) -> List[Optional[str]]:
+        """
+        Convert several unformatted texts to tagged format with a single LLM call.
+
+        :param raw_texts: The unformatted texts, in order.
+        :return: The tagged record for each input text, or None where the reply had none.
+        """
+        results: List[Optional[str]] = [None] * len(raw_texts)
+        try:
+            prompt_template = self.tagged_batch_prompt
+            if not prompt_template:
+                logger.error("Tagged batch prompt template not found in prompts.yaml.")
+                return results
+            numbered_texts = "\n\n".join(f"Text {i}:\n{text}" for i, text in enumerate(raw_texts, start=1))
+            prompt = prompt_template.format(raw_texts=numbered_texts)
+            formatted_output = self.provider.send_message(prompt=prompt)
+            if not formatted_output:
+                logger.error("LLMFormatter failed to convert the batch to tagged format.")
+                return results
+
+            for match in _BATCH_RECORD_RE.finditer(formatted_output):
+                idx = int(match.group(1)) - 1
+                if 0 <= idx < len(results):
+                    results[idx] = match.group(0)
+
+            missing = results.count(None)
+            if missing:
+                logger.warning(f"Batched formatting returned no record for {missing} of {len(raw_texts)} texts.")
+            return results
+        except Exception as e:
+            logger.error(f"Error in format_batch method: {e}")
+            return results
+
     def _initialize_provider_override(self, provider: str) -> APIProvider:
         """
         Initialize a different provider on the fly.
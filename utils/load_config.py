@@ -1,14 +1,36 @@
 import yaml
 import logging
 import re
+from functools import lru_cache
 from dotenv import load_dotenv
 
 import os
 # logging.getLogger(__name__)
 
+# Prefer the libyaml-backed loader; fall back to the pure-Python one if PyYAML was built without libyaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Matches ${VAR_NAME} placeholders in config strings
+_ENV_VAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+def _env_value(match):
+    """
+    Replacement callback for _ENV_VAR_PATTERN: the variable's value, or '' if it is not set.
+    """
+    var = match.group(1)
+    env_value = os.environ.get(var, "")
+    if not env_value:
+        logging.warning(f"Environment variable '{var}' is not set.")
+    return env_value
+
+@lru_cache(maxsize=None)
 def load_config(config_path='config/config.yaml', dotenv_path='config/.env'):
     """
     Load the YAML configuration file and resolve environment variables.
+    Results are cached per (config_path, dotenv_path), so repeated calls are free.
 
     :param config_path: Path to the YAML configuration file.
     :param dotenv_path: Path to the .env file containing environment variables.
@@ -22,7 +44,7 @@ def load_config(config_path='config/config.yaml', dotenv_path='config/.env'):
             logging.info(f"Loaded environment variables from '{dotenv_path}'.")
         
         with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
+            config = yaml.load(file, Loader=SafeLoader)
 
         # Define a recursive function to substitute environment variables
         def substitute_env_vars(obj):
@@ -31,15 +53,10 @@ def load_config(config_path='config/config.yaml', dotenv_path='config/.env'):
             elif isinstance(obj, list):
                 return [substitute_env_vars(element) for element in obj]
             elif isinstance(obj, str):
-                # Find all occurrences of ${VAR_NAME}
-                pattern = re.compile(r'\$\{([^}]+)\}')
-                matches = pattern.findall(obj)
-                for var in matches:
-                    env_value = os.environ.get(var, "")
-                    if not env_value:
-                        logging.warning(f"Environment variable '{var}' is not set.")
-                    obj = obj.replace(f"${{{var}}}", env_value)
-                return obj
+                # Replace every ${VAR_NAME} in a single pass; most strings have none
+                if '${' not in obj:
+                    return obj
+                return _ENV_VAR_PATTERN.sub(_env_value, obj)
             else:
                 return obj
 
@@ -4,13 +4,25 @@ import logging
 import sys
 import os
 
-def setup_logging(log_file: str, level: str = "INFO"):
+# Shared by every handler; built once at import time
+_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# Set once the root logger has been configured; later calls are no-ops
+_INITIALIZED = False
+
+def setup_logging(log_file: str, level: str = "INFO", to_console: bool = True):
     """
     Configure logging to file and console.
+    Only the first call configures the root logger; repeated calls return immediately.
 
     :param log_file: Path to the log file.
     :param level: Logging level as a string (e.g., "DEBUG", "INFO").
+    :param to_console: Whether to also log to stdout.
     """
+    global _INITIALIZED
+    if _INITIALIZED:
+        return
+
     # Convert the level string to a numeric level
     numeric_level = getattr(logging, level.upper(), None)
     if not isinstance(numeric_level, int):
@@ -35,26 +47,24 @@ def setup_logging(log_file: str, level: str = "INFO"):
     if logger.hasHandlers():
         logger.handlers.clear()
 
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-
     # Create and configure FileHandler
     try:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(numeric_level)
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(_FORMATTER)
         logger.addHandler(file_handler)
     except Exception as e:
         print(f"Failed to set up FileHandler: {e}")
         # If file handler fails, proceed with console handler only
 
     # Create and configure StreamHandler for console output
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setLevel(numeric_level)
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    if to_console:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setLevel(numeric_level)
+        stream_handler.setFormatter(_FORMATTER)
+        logger.addHandler(stream_handler)
+
+    _INITIALIZED = True
 
     # Log the setup completion
     logger.info(f"Logging is set up with level {logging.getLevelName(numeric_level)}.")
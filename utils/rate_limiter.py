@@ -1,7 +1,9 @@
 # utils/rate_limiter.py
 
 import time
+import asyncio
 import logging
+import threading
 
 # logging.getLogger(__name__)
 class RateLimiter:
@@ -14,16 +16,96 @@ class RateLimiter:
         self.max_calls = max_calls
         self.period = period
         self.call_times = []
+        self._lock = threading.Lock()
 
     def wait(self):
         """
         Wait if the rate limit has been reached.
+        Safe to call from multiple worker threads.
         """
-        current_time = time.time()
-        # Remove calls that are outside the current period
-        self.call_times = [t for t in self.call_times if t > current_time - self.period]
-        if len(self.call_times) >= self.max_calls:
-            wait_time = self.period - (current_time - self.call_times[0])
-            logging.info(f"Rate limit reached. Waiting for {wait_time} seconds.")
+        with self._lock:
+            current_time = time.time()
+            # Remove calls that are outside the current period
+            self.call_times = [t for t in self.call_times if t > current_time - self.period]
+            if len(self.call_times) >= self.max_calls:
+                wait_time = self.period - (current_time - self.call_times[0])
+                logging.info(f"Rate limit reached. Waiting for {wait_time} seconds.")
+                time.sleep(wait_time)
+            self.call_times.append(time.time())
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_rate):
+        """
+        Initialize the token bucket.
+        :param capacity: Maximum number of tokens (burst size).
+        :param refill_rate: Number of tokens added per second.
+        """
+        if capacity <= 0 or refill_rate <= 0:
+            raise ValueError(f"Token bucket needs a positive capacity and refill rate, got {capacity} and {refill_rate}.")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """
+        Add the tokens accumulated since the last refill, up to capacity.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """
+        Consume one token, sleeping only when the bucket is empty.
+        Safe to call from multiple worker threads.
+        """
+        while True:
+            wait_time = self._try_acquire()
+            if not wait_time:
+                return
+            logging.debug(f"Token bucket empty. Waiting for {wait_time:.2f} seconds.")
             time.sleep(wait_time)
-        self.call_times.append(time.time())
+
+    def _try_acquire(self):
+        """
+        Consume one token if available.
+        :return: 0 on success, otherwise the number of seconds until a token is due.
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.refill_rate
+
+    async def acquire_async(self):
+        """
+        Consume one token, yielding to the event loop while the bucket is empty.
+        """
+        while True:
+            wait_time = self._try_acquire()
+            if not wait_time:
+                return
+            logging.debug(f"Token bucket empty. Waiting for {wait_time:.2f} seconds.")
+            await asyncio.sleep(wait_time)
+
+
+# Token buckets shared by every caller using the same key (e.g. one per API key)
+_SHARED_BUCKETS = {}
+_SHARED_BUCKETS_LOCK = threading.Lock()
+
+def get_shared_bucket(key, requests_per_minute):
+    """
+    Return the token bucket shared by all callers with the same key.
+    :param key: Identifies the budget being shared, such as an API key.
+    :param requests_per_minute: Request budget used when the bucket is first created.
+    """
+    with _SHARED_BUCKETS_LOCK:
+        bucket = _SHARED_BUCKETS.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity=requests_per_minute, refill_rate=requests_per_minute / 60)
+            _SHARED_BUCKETS[key] = bucket
+        return bucket
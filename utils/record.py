@@ -6,7 +6,7 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import json
+import orjson
 import logging
 from typing import Any, Dict, List, Optional, Union
 import re
@@ -20,11 +20,45 @@ from utils.validation import detect_text_type
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Field patterns for tagged records, compiled once at import time
+_RECORD_ID_RE = re.compile(r'<id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>')
+_DOCUMENT_ID_RE = re.compile(r'<document_id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>')
+_CHUNK_ID_RE = re.compile(r'<chunk_id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>')
+_HIERARCHY_LEVEL_RE = re.compile(r'<hierarchy_level=(\d+)>')
+_LIST_ITEM_RE = re.compile(r'<(.*?)>')
+
+
+def _tag_value(text: str, tag: str) -> Optional[str]:
+    """
+    Return the raw text between the first <tag> and the following </tag>.
+    Two str.find calls replace a lazy DOTALL regex scan of the whole record.
+
+    :param text: The tagged record string.
+    :param tag: The tag name without angle brackets.
+    :return: The enclosed text, or None if the tag pair is missing.
+    """
+    open_tag = f'<{tag}>'
+    start = text.find(open_tag)
+    if start < 0:
+        return None
+    start += len(open_tag)
+    end = text.find(f'</{tag}>', start)
+    if end < 0:
+        return None
+    return text[start:end]
+
 
 class Record:
     """
     A class to represent and handle a single record for RAG implementation.
     """
+
+    # Fixed attribute layout: no per-instance __dict__ for the many records held in memory
+    __slots__ = (
+        'record_id', 'document_id', 'title', 'content', 'chunk_id',
+        'hierarchy_level', 'categories', 'relationships', 'published_date',
+        'source', 'processing_timestamp', 'validation_status', 'language', 'summary'
+    )
     
     def __init__(
         self,
@@ -89,7 +123,7 @@ class Record:
         """
         record = cls.parse_record(record_str=text, return_type="record", record_type=record_type)
         if record:
-            logger.info(f"Record ID {record.record_id} created successfully from tagged text.")
+            logger.debug(f"Record ID {record.record_id} created successfully from tagged text.")
             return record
         else:
             logger.error("Failed to create Record from tagged text.")
@@ -217,7 +251,7 @@ class Record:
         :return: JSON string representation of the Record.
         """
         try:
-            return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+            return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2).decode('utf-8')
         except Exception as e:
             logger.error(f"Error converting Record to JSON: {e}")
             return ""
@@ -318,7 +352,7 @@ class Record:
                 if not llm_formatter:
                     logger.error("LLMFormatter instance is required to process unformatted text.")
                     return None
-                logger.info("Converting unformatted text to tagged format using LLMFormatter.")
+                logger.debug("Converting unformatted text to tagged format using LLMFormatter.")
                 formatted_text = llm_formatter.format_text(raw_text=record_str, mode="tagged")
                 if not formatted_text:
                     logger.error("LLMFormatter failed to format unformatted text.")
@@ -331,51 +365,51 @@ class Record:
             if text_type == "json":
                 # Parse JSON and create Record
                 try:
-                    data = json.loads(record_str)
+                    data = orjson.loads(record_str)
                     logger.debug("Input is detected as JSON format.")
                     record = cls.from_json(data)
                     if record:
-                        logger.info(f"Record parsed successfully from JSON with ID: {record.record_id}")
+                        logger.debug(f"Record parsed successfully from JSON with ID: {record.record_id}")
                     else:
                         logger.warning("Failed to create Record from JSON data.")
-                except json.JSONDecodeError as e:
+                except orjson.JSONDecodeError as e:
                     logger.error(f"JSON decoding error: {e}")
                     return None
 
             elif text_type == "tagged":
                 # Extract fields using regular expressions with flexible ID patterns
-                record_id_match = re.search(r'<id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>', record_str)
-                document_id_match = re.search(r'<document_id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>', record_str)
-                chunk_id_match = re.search(r'<chunk_id=([A-Za-z]{2,3}_[A-Za-z0-9]+)>', record_str)
-                title_match = re.search(r'<title>(.*?)</title>', record_str, re.DOTALL)
-                content_match = re.search(r'<content>(.*?)</content>', record_str, re.DOTALL)
-                hierarchy_level_match = re.search(r'<hierarchy_level=(\d+)>', record_str)
-                published_date_match = re.search(r'<published_date>(.*?)</published_date>', record_str, re.DOTALL)
-                categories_match = re.search(r'<categories>(.*?)</categories>', record_str, re.DOTALL)
-                relationships_match = re.search(r'<relationships>(.*?)</relationships>', record_str, re.DOTALL)
-                source_match = re.search(r'<source>(.*?)</source>', record_str, re.DOTALL)
-                processing_timestamp_match = re.search(r'<processing_timestamp>(.*?)</processing_timestamp>', record_str, re.DOTALL)
-                validation_status_match = re.search(r'<validation_status>(True|False)</validation_status>', record_str, re.DOTALL)
-                language_match = re.search(r'<language>(.*?)</language>', record_str, re.DOTALL)
-                summary_match = re.search(r'<summary>(.*?)</summary>', record_str, re.DOTALL)
+                record_id_match = _RECORD_ID_RE.search(record_str)
+                document_id_match = _DOCUMENT_ID_RE.search(record_str)
+                chunk_id_match = _CHUNK_ID_RE.search(record_str)
+                hierarchy_level_match = _HIERARCHY_LEVEL_RE.search(record_str)
+                title = _tag_value(record_str, 'title')
+                content = _tag_value(record_str, 'content')
+                published_date = _tag_value(record_str, 'published_date')
+                categories_str = _tag_value(record_str, 'categories')
+                relationships_str = _tag_value(record_str, 'relationships')
+                source = _tag_value(record_str, 'source')
+                processing_timestamp = _tag_value(record_str, 'processing_timestamp')
+                validation_status = _tag_value(record_str, 'validation_status')
+                language = _tag_value(record_str, 'language')
+                summary = _tag_value(record_str, 'summary')
 
                 # Initialize variables with default or extracted values
                 record_id = record_id_match.group(1).strip() if record_id_match else generate_unique_id(record_type)
                 document_id = document_id_match.group(1).strip() if document_id_match else ("N/A" if record_type == "QA" else generate_unique_id("DOC"))
                 chunk_id = chunk_id_match.group(1).strip() if chunk_id_match else ("N/A" if record_type == "QA" else generate_unique_id("CHNK"))
-                title = title_match.group(1).strip() if title_match else None
-                content = content_match.group(1).strip() if content_match else None
+                title = title.strip() if title is not None else None
+                content = content.strip() if content is not None else None
                 hierarchy_level = int(hierarchy_level_match.group(1)) if hierarchy_level_match else 1  # Default to 1 if missing
-                published_date = published_date_match.group(1).strip() if published_date_match else None
-                categories_str = categories_match.group(1).strip() if categories_match else ''
-                categories = re.findall(r'<(.*?)>', categories_str) if categories_str else []
-                relationships_str = relationships_match.group(1).strip() if relationships_match else ''
-                relationships = re.findall(r'<(.*?)>', relationships_str) if relationships_str else []
-                source = source_match.group(1).strip() if source_match else None
-                processing_timestamp = processing_timestamp_match.group(1).strip() if processing_timestamp_match else pd.Timestamp.now().isoformat()
-                validation_status = True if validation_status_match and validation_status_match.group(1) == 'True' else False
-                language = language_match.group(1).strip() if language_match else 'vi'
-                summary = summary_match.group(1).strip() if summary_match else ''
+                published_date = published_date.strip() if published_date is not None else None
+                categories_str = categories_str.strip() if categories_str else ''
+                categories = _LIST_ITEM_RE.findall(categories_str) if categories_str else []
+                relationships_str = relationships_str.strip() if relationships_str else ''
+                relationships = _LIST_ITEM_RE.findall(relationships_str) if relationships_str else []
+                source = source.strip() if source is not None else None
+                processing_timestamp = processing_timestamp.strip() if processing_timestamp is not None else pd.Timestamp.now().isoformat()
+                validation_status = validation_status == 'True'
+                language = language.strip() if language is not None else 'vi'
+                summary = summary.strip() if summary is not None else ''
 
                 # Check for mandatory fields: title and content
                 if not title or not content:
@@ -403,7 +437,7 @@ class Record:
                 # Create Record instance
                 record = cls.from_json(record_dict)
                 if record:
-                    logger.info(f"Record parsed successfully from tagged text with ID: {record.record_id}")
+                    logger.debug(f"Record parsed successfully from tagged text with ID: {record.record_id}")
                 else:
                     logger.warning("Failed to create Record from tagged text data.")
 
@@ -417,7 +451,7 @@ class Record:
             elif return_type == "dict":
                 return record_dict
             elif return_type == "json":
-                return json.dumps(record_dict, ensure_ascii=False, indent=2)
+                return orjson.dumps(record_dict, option=orjson.OPT_INDENT_2).decode('utf-8')
             else:
                 logger.error(f"Invalid return_type '{return_type}' specified. Choose from 'record', 'dict', 'json'.")
                 return None
@@ -1,17 +1,51 @@
 # utils/retry_handler.py
 
 import time
+import random
+import asyncio
+import inspect
 import logging
 from functools import wraps
 # logging.getLogger(__name__)
-def retry(max_attempts=2, delay=2, backoff=2):
+def retry(max_attempts=2, delay=2, backoff=2, max_delay=None, jitter=False, exceptions=(Exception,)):
     """
     Decorator to retry a function in case of exceptions.
+    Works on both regular functions and coroutine functions.
     :param max_attempts: Maximum number of attempts.
     :param delay: Initial delay between attempts.
     :param backoff: Multiplier for delay on each retry.
+    :param max_delay: Upper bound for the delay between attempts, or None for no bound.
+    :param jitter: Sleep a random time up to the current delay, so that many callers
+                   failing together do not retry in lockstep.
+    :param exceptions: Exception types that trigger a retry; anything else is raised at once.
     """
+    def next_sleep(current_delay):
+        if max_delay is not None:
+            current_delay = min(current_delay, max_delay)
+        return random.uniform(0, current_delay) if jitter else current_delay
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = 0
+                current_delay = delay
+                while attempts < max_attempts:
+                    try:
+                        return await func(*args, **kwargs)
+                    except exceptions as e:
+                        attempts += 1
+                        logging.warning(f"Attempt {attempts} failed with error: {e}")
+                        if attempts < max_attempts:
+                            sleep_time = next_sleep(current_delay)
+                            logging.info(f"Retrying after {sleep_time:.2f} seconds...")
+                            await asyncio.sleep(sleep_time)
+                            current_delay *= backoff
+                        else:
+                            logging.error(f"All {max_attempts} attempts failed.")
+                            raise
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             attempts = 0
@@ -19,12 +53,13 @@ def retry(max_attempts=2, delay=2, backoff=2):
             while attempts < max_attempts:
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except exceptions as e:
                     attempts += 1
                     logging.warning(f"Attempt {attempts} failed with error: {e}")
                     if attempts < max_attempts:
-                        logging.info(f"Retrying after {current_delay} seconds...")
-                        time.sleep(current_delay)
+                        sleep_time = next_sleep(current_delay)
+                        logging.info(f"Retrying after {sleep_time:.2f} seconds...")
+                        time.sleep(sleep_time)
                         current_delay *= backoff
                     else:
                         logging.error(f"All {max_attempts} attempts failed.")
@@ -1,34 +1,71 @@
 # utils/validation.py
 
-import json
+import os
+import orjson
 import yaml
 import logging
 import re
+from functools import lru_cache
 from langdetect import detect
-from providers.groq_provider import GroqProvider
-from jsonschema import validate, ValidationError
+from providers import ProviderFactory
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 from typing import Dict, Any, Optional
+from utils.load_config import SafeLoader
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mandatory tags used to recognise tagged text
+_TITLE_TAG_RE = re.compile(r'<title>.*?</title>', re.DOTALL)
+_CONTENT_TAG_RE = re.compile(r'<content>.*?</content>', re.DOTALL)
+
+# Language identification only needs a prefix of the text
+_LID_SAMPLE_CHARS = 1000
+
+# Groq providers used by llm_validate, keyed by their serialized 'groq' config section
+_VALIDATION_PROVIDERS: Dict[bytes, Any] = {}
+
+# Letters with Vietnamese diacritics; their presence rules out English cheaply
+_VN_LOWER = 'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ'
+_VN_CHARS = frozenset(_VN_LOWER + _VN_LOWER.upper())
+
 # logging.getLogger(__name__)
+@lru_cache(maxsize=8)
 def load_schema(schema_path):
     """
     Load a YAML schema from a file.
+    The parsed schema is cached per path; treat the returned dictionary as read-only.
     
     :param schema_path: Path to the YAML schema file.
     :return: Parsed schema as a Python dictionary.
     """
     try:
         with open(schema_path, 'r', encoding='utf-8') as f:
-            schema = yaml.safe_load(f)
+            schema = yaml.load(f, Loader=SafeLoader)
         logger.info(f"Loaded schema from '{schema_path}'.")
         return schema
     except Exception as e:
         logger.error(f"Error loading schema '{schema_path}': {e}")
         raise
 
+@lru_cache(maxsize=8)
+def _get_validator(schema_path: str, requirements_key: Optional[str] = None):
+    """
+    Build a JSON schema validator for a YAML schema file, once per file.
+
+    :param schema_path: Path to the YAML schema file.
+    :param requirements_key: Top-level key holding processing requirements, excluded from the schema.
+    :return: A jsonschema validator instance.
+    """
+    schema_full = load_schema(schema_path)
+    json_schema = {k: v for k, v in schema_full.items() if k != requirements_key}
+    validator_class = validator_for(json_schema)
+    validator_class.check_schema(json_schema)
+    logger.debug(f"Compiled validator for schema '{schema_path}'.")
+    return validator_class(json_schema)
+
 def validate_record(record: Any, schema_path: str, mode: str = 'default', config: Optional[Dict[str, Any]] = None) -> bool:
     """
     Validate a single record against the provided JSON schema based on the mode.
@@ -46,14 +83,15 @@ def validate_record(record: Any, schema_path: str, mode: str = 'default', config
                 logger.error("Configuration must be provided for preprocessing mode.")
                 return False
             # Load pre_processing_schema.yml
-            schema_full = load_schema('config/schemas/preprocessing_schema.yaml')
+            schema_file = 'config/schemas/preprocessing_schema.yaml'
+            requirements_key = 'pre_process_requirements'
+            schema_full = load_schema(schema_file)
             if schema_full is None:
                 logger.error("Failed to load 'preprocessing_schema.yaml'.")
                 return False
-            # Extract the JSON schema part (exclude 'pre_process_requirements')
-            # Assuming 'pre_process_requirements' is a separate key
-            json_schema = {k: v for k, v in schema_full.items() if k != 'pre_process_requirements'}
-            if not json_schema:
+            # The JSON schema is everything except 'pre_process_requirements'; the compiled
+            # validator is cached, so only check here that such keys exist
+            if not any(k != requirements_key for k in schema_full):
                 logger.error("JSON schema not found in 'preprocessing_schema.yaml'.")
                 return False
 
@@ -62,18 +100,21 @@ def validate_record(record: Any, schema_path: str, mode: str = 'default', config
                 logger.error("Configuration must be provided for postprocessing mode.")
                 return False
             # Load postprocessing_schema.yml
-            schema_full = load_schema('config/schemas/postprocessing_schema.yml')
+            schema_file = 'config/schemas/postprocessing_schema.yml'
+            requirements_key = 'post_process_requirements'
+            schema_full = load_schema(schema_file)
             if schema_full is None:
                 logger.error("Failed to load 'postprocessing_schema.yml'.")
                 return False
-            # Extract the JSON schema part (exclude 'post_process_requirements' if exists)
-            json_schema = {k: v for k, v in schema_full.items() if k != 'post_process_requirements'}
-            if not json_schema:
+            # The JSON schema is everything except 'post_process_requirements', if it exists
+            if not any(k != requirements_key for k in schema_full):
                 logger.error("JSON schema not found in 'postprocessing_schema.yml'.")
                 return False
 
         elif mode == 'default':
             # Use the provided schema_path directly
+            schema_file = schema_path
+            requirements_key = None
             json_schema = load_schema(schema_path)
             if json_schema is None:
                 logger.error(f"Failed to load schema from '{schema_path}'.")
@@ -86,9 +127,9 @@ def validate_record(record: Any, schema_path: str, mode: str = 'default', config
         if not isinstance(record, dict):
             logger.debug("Record is not a dictionary. Attempting to convert from JSON string.")
             try:
-                record = json.loads(record)
+                record = orjson.loads(record)
                 logger.debug("Record successfully converted to dictionary with JSON module.")
-            except json.JSONDecodeError as jde:
+            except orjson.JSONDecodeError as jde:
                 logger.error(f"Failed to decode JSON for record: {jde.msg}")
                 return False
 
@@ -103,12 +144,14 @@ def validate_record(record: Any, schema_path: str, mode: str = 'default', config
                 return False
             logger.debug(f"LLM validation passed for record ID {record.get('id', 'N/A')}.")
 
-        # Step 4: Validate the record against the JSON schema
-        validate(instance=record, schema=json_schema)
+        # Step 4: Validate the record against the JSON schema, reusing the compiled validator
+        error = best_match(_get_validator(schema_file, requirements_key).iter_errors(record))
+        if error is not None:
+            raise error
 
         # Step 5: Extract 'id' for logging, if available
         record_id = record.get('id', 'N/A')
-        logger.info(f"Record ID {record_id} passed validation in mode '{mode}'.")
+        logger.debug(f"Record ID {record_id} passed validation in mode '{mode}'.")
         return True
 
     except ValidationError as ve:
@@ -145,6 +188,7 @@ def mask_api_key(api_key):
 def llm_validate(record: Dict[str, Any], requirements: Dict[str, Any], config: Dict[str, Any]) -> bool:
     """
     Validate the record against the requirements using the GroqProvider.
+    The model is asked for {"compliant": bool, "errors": [...]}; any other reply counts as non-compliant.
 
     :param record: The record to validate as a dictionary.
     :param requirements: The JSON schema or requirements to validate against.
@@ -152,21 +196,42 @@ def llm_validate(record: Dict[str, Any], requirements: Dict[str, Any], config: D
     :return: True if compliant, False otherwise.
     """
     try:
-        logger.debug("Initializing GroqProvider for LLM validation.")
-        # Initialize GroqProvider with config and requirements
-        groq_provider = GroqProvider(config=config, requirements=requirements)
-        
-        logging.debug("Processing record with GroqProvider.")
-        processed_record_json = groq_provider.process_record(record)
-        
-        if processed_record_json is None:
+        groq_config = config.get('groq', {})
+        provider_key = orjson.dumps(groq_config, option=orjson.OPT_SORT_KEYS)
+        provider = _VALIDATION_PROVIDERS.get(provider_key)
+        if provider is None:
+            logger.debug("Initializing GroqProvider for LLM validation.")
+            # The requirements go in the prompt, so the provider can be reused across calls
+            provider = ProviderFactory.get_provider('groq', groq_config, "")
+            _VALIDATION_PROVIDERS[provider_key] = provider
+
+        logger.debug("Processing record with GroqProvider.")
+        prompt = (
+            f"Check whether the following record meets these requirements. "
+            f"Reply with only a JSON object of the form "
+            f'{{"compliant": true or false, "errors": ["<one entry per unmet requirement>"]}}.\n\n'
+            f"Requirements:\n{orjson.dumps(requirements).decode('utf-8')}\n\n"
+            f"Record:\n{orjson.dumps(record).decode('utf-8')}"
+        )
+        reply = provider.send_message(prompt, json_mode=True)
+
+        if reply is None:
             logger.error("GroqProvider failed to process the record.")
             return False
-        
-        # Optionally, you can further process or validate the `processed_record_json` if needed
-        # For now, we'll assume that a successful processing indicates compliance
-        logger.debug("GroqProvider successfully processed the record.")
-        return True
+
+        try:
+            verdict = orjson.loads(reply)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"LLM validation reply is not valid JSON: {e}")
+            return False
+        if not isinstance(verdict, dict):
+            logger.error("LLM validation reply is not a JSON object.")
+            return False
+
+        is_compliant = verdict.get("compliant") is True
+        if not is_compliant:
+            logger.warning(f"LLM validation reported errors: {verdict.get('errors', [])}")
+        return is_compliant
 
     except Exception as e:
         logger.error(f"LLM validation failed with exception: {e}")
@@ -181,15 +246,15 @@ def detect_text_type(text: str) -> str:
     """
     # Attempt to parse as JSON
     try:
-        json.loads(text)
+        orjson.loads(text)
         logger.debug("Input detected as JSON format.")
         return "json"
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         logger.debug("Input is not JSON format.")
     
     # Check for mandatory tags
-    has_title = re.search(r'<title>.*?</title>', text, re.DOTALL)
-    has_content = re.search(r'<content>.*?</content>', text, re.DOTALL)
+    has_title = _TITLE_TAG_RE.search(text)
+    has_content = _CONTENT_TAG_RE.search(text)
     
     if has_title and has_content:
         logger.debug("Input detected as tagged text format.")
@@ -198,8 +263,50 @@ def detect_text_type(text: str) -> str:
     logger.debug("Input detected as unformatted text.")
     return "unformatted"
 
+@lru_cache(maxsize=None)
+def _load_lid_model():
+    """
+    Load the fastText language identification model named by LID_MODEL_PATH.
+    Returns None when the variable is unset or fasttext is not installed,
+    in which case langdetect is used instead.
+    """
+    model_path = os.getenv('LID_MODEL_PATH')
+    if not model_path:
+        return None
+    try:
+        import fasttext
+        model = fasttext.load_model(model_path)
+        logger.info(f"Loaded language identification model from '{model_path}'.")
+        return model
+    except Exception as e:
+        logger.warning(f"Falling back to langdetect; could not load '{model_path}': {e}")
+        return None
+
+def is_vietnamese(text: str, threshold: float = 0.01, sample_size: int = 500) -> bool:
+    """
+    Cheaply decide whether text is Vietnamese from the share of diacritic letters.
+
+    :param text: The text to check.
+    :param threshold: Minimum fraction of Vietnamese diacritic characters in the sample.
+    :param sample_size: Number of leading characters to inspect.
+    :return: True if the text looks Vietnamese.
+    """
+    sample = text[:sample_size]
+    if not sample:
+        return False
+    count = sum(1 for c in sample if c in _VN_CHARS)
+    return count / len(sample) >= threshold
+
 def is_english(text):
     try:
-        return detect(text) == 'en'
+        # Skip the statistical detector for text that is clearly Vietnamese
+        if is_vietnamese(text):
+            return False
+        sample = text[:_LID_SAMPLE_CHARS].replace('\n', ' ')
+        model = _load_lid_model()
+        if model is not None:
+            labels, _ = model.predict(sample)
+            return labels[0] == '__label__en'
+        return detect(sample) == 'en'
     except Exception as e:
         return False
\ No newline at end of file